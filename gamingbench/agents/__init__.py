@@ -1,8 +1,12 @@
 
-from gamingbench.agents.prompt_agent import PromptAgent
-from gamingbench.agents.cot_agent import CoTAgent
-from gamingbench.agents.sc_cot_agent import SCCoTAgent
-from gamingbench.agents.tot_agent import ToTAgent
-from gamingbench.agents.random_agent import RandomAgent
-from gamingbench.agents.mcts_agent import MCTSAgent
-from gamingbench.agents.titfortat_agent import TitForTatAgent
+from gamingbench.utils.lazy import lazy_classes
+
+__getattr__ = lazy_classes(__name__, {
+    'PromptAgent': 'gamingbench.agents.prompt_agent',
+    'CoTAgent': 'gamingbench.agents.cot_agent',
+    'SCCoTAgent': 'gamingbench.agents.sc_cot_agent',
+    'ToTAgent': 'gamingbench.agents.tot_agent',
+    'RandomAgent': 'gamingbench.agents.random_agent',
+    'MCTSAgent': 'gamingbench.agents.mcts_agent',
+    'TitForTatAgent': 'gamingbench.agents.titfortat_agent',
+})
@@ -1,5 +1,6 @@
 
 import re
+import asyncio
 from gamingbench.utils.history_tracker import Query
 from gamingbench.utils import utils
 
@@ -16,6 +17,38 @@ class BaseAgent(object):
     def step(self, observations):
         pass
 
+    async def astep(self, observations):
+        '''
+        Coroutine version of step. By default the synchronous step runs in
+        the event loop's executor, so CPU-heavy agents (e.g. MCTS) don't block
+        the other matches.
+        '''
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.step, observations)
+
+    def reset(self, rng=None):
+        '''
+        Called before every match with the agent's own random generator of
+        that match; agents that keep state across steps should clear it here
+        and stochastic agents should draw from `rng` only.
+        '''
+        pass
+
+    def is_deterministic(self):
+        '''
+        Whether the agent always answers the same observation with the same
+        move. Deterministic matchups are only played once per seat order
+        with --collapse-deterministic.
+        '''
+        return False
+
+    def query_pattern(self):
+        '''
+        LLM queries of one step as (prompt_type, n) pairs, without retries.
+        Used to estimate the cost of a run before it is played.
+        '''
+        return []
+
     def set_game_deep_copy(self, game):
         self.game_env = game
 
@@ -32,6 +65,38 @@ class BaseAgent(object):
             messages, prompt_type, generations, token_size=completion_tokens + prompt_tokens)
         return generations, query
 
+    async def allm_query(self, messages, n, stop, prompt_type):
+        if self.model == None:
+            raise NotImplementedError
+        assert prompt_type in ['move', 'plan', 'vote']
+        generations, completion_tokens, prompt_tokens = await self.model.aquery(
+            messages, n, stop, prompt_type)
+        query = self._prompt_to_query(
+            messages, prompt_type, generations, token_size=completion_tokens + prompt_tokens)
+        return generations, query
+
+    def run_queries(self, step_gen):
+        '''
+        Drive a step generator: it yields llm_query arguments, receives
+        (generations, query) and finally returns (move, query_list). LLM
+        agents write their step logic once this way and get both step and
+        astep from it.
+        '''
+        try:
+            request = next(step_gen)
+            while True:
+                request = step_gen.send(self.llm_query(*request))
+        except StopIteration as stop:
+            return stop.value
+
+    async def arun_queries(self, step_gen):
+        try:
+            request = next(step_gen)
+            while True:
+                request = step_gen.send(await self.allm_query(*request))
+        except StopIteration as stop:
+            return stop.value
+
     @staticmethod
     def parse_with_regex(content, regex):
         assert isinstance(content, list)
@@ -16,6 +16,7 @@ class MCTSAgent(BaseAgent):
         self.verbose = config.verbose
         rng = np.random.RandomState()
         evaluator = mcts.RandomRolloutEvaluator(self.rollout_count, rng)
+        self.evaluator = evaluator
         self.bot = mcts.MCTSBot(
             kwargs['game'],
             self.uct_c,
@@ -36,6 +37,14 @@ class MCTSAgent(BaseAgent):
         print(action)
         return agent_action_list[openspiel_action_list.index(action)], []
 
+    def reset(self, rng=None):
+        if rng is not None:
+            # the OpenSpiel bot and evaluator only take a legacy RandomState
+            random_state = np.random.RandomState(rng.bit_generator)
+            self.bot._random_state = random_state
+            self.evaluator._random_state = random_state
+        self.bot.restart()
+
     def inform_action(self, state, player_idx, action):
         self.bot.inform_action(state, player_idx, action)
 
@@ -18,7 +18,18 @@ class PromptAgent(BaseAgent):
         :param observations:
         :return:
         """
+        return self.run_queries(self._step_gen(observations))
 
+    async def astep(self, observations):
+        return await self.arun_queries(self._step_gen(observations))
+
+    def is_deterministic(self):
+        return self.model is not None and self.model.is_deterministic()
+
+    def query_pattern(self):
+        return [('move', self.num_generations)]
+
+    def _step_gen(self, observations):
         self.logger.info('-' * 20 + f'{self.agent_name} Begin' + '-' * 20)
         query_list = []
 
@@ -34,8 +45,7 @@ class PromptAgent(BaseAgent):
         msgs = self.construct_init_messages(
             system_prompt, observation_prompt)
 
-        responses, query = self.llm_query(
-            msgs, n=self.num_generations, stop=None, prompt_type='move')
+        responses, query = yield (msgs, self.num_generations, None, 'move')
         query_list.append(query)
 
         self.logger.info(f'Prompt: {observation_prompt}')
@@ -50,8 +60,7 @@ class PromptAgent(BaseAgent):
             # Retry once with a short reminder if parsing failed
             retry_prompt = observation_prompt + "\n\nReminder: Answer ONLY in the required format. Provide exactly one legal action wrapped with <>."
             retry_msgs = self.construct_init_messages(system_prompt, retry_prompt)
-            retry_responses, retry_query = self.llm_query(
-                retry_msgs, n=1, stop=None, prompt_type='move')
+            retry_responses, retry_query = yield (retry_msgs, 1, None, 'move')
             query_list.append(retry_query)
             self.logger.info(f'Retry Response: {retry_responses}')
             retry_moves = self.parse_with_regex(retry_responses, regex)
@@ -7,7 +7,12 @@ class RandomAgent(BaseAgent):
 
     def __init__(self, config, **kwargs):
         super(RandomAgent, self).__init__(config)
+        self.rng = np.random.default_rng()
+
+    def reset(self, rng=None):
+        if rng is not None:
+            self.rng = rng
 
     def step(self, observations):
         agent_action_list = observations['legal_moves']
-        return np.random.choice(agent_action_list), []
\ No newline at end of file
+        return self.rng.choice(agent_action_list), []
\ No newline at end of file
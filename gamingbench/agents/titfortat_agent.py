@@ -8,6 +8,9 @@ class TitForTatAgent(BaseAgent):
     def __init__(self, config, **kwargs):
         super(TitForTatAgent, self).__init__(config)
 
+    def is_deterministic(self):
+        return True
+
     def step(self, observations):
         assert observations, print('Tit-for-Tat Agent only works for Iterated Prisoner\'s Dilemma')
         opponent_moves = observations['opponent_moves']
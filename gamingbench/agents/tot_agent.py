@@ -20,6 +20,25 @@ class ToTAgent(BaseAgent):
         self.prompt_sample = config.prompt_sample
 
     def step(self, observations):
+        return self.run_queries(self._step_gen(observations))
+
+    async def astep(self, observations):
+        return await self.arun_queries(self._step_gen(observations))
+
+    def is_deterministic(self):
+        return self.model is not None and self.model.is_deterministic()
+
+    def query_pattern(self):
+        # every kept thought is extended by one sampling query, then all are voted on
+        pattern = []
+        num_ys = 1
+        for _ in range(self.task_steps):
+            pattern += [('plan', self.n_generate_sample)] * num_ys
+            pattern.append(('vote', self.n_evaluate_sample))
+            num_ys = min(self.n_select_sample, num_ys * self.n_generate_sample)
+        return pattern
+
+    def _step_gen(self, observations):
         self.logger.info('-' * 20 + 'ToTAgent Begin' + '-' * 20)
         # we follow the official tot implementation: https://github.com/princeton-nlp/tree-of-thought-llm/blob/master/src/tot/methods/bfs.py
         env_name = observations['env_name']
@@ -41,7 +60,9 @@ class ToTAgent(BaseAgent):
             # generation
             x = self.construct_init_messages(system_prompt, observation_prompt + '\n' + step_prompt)
             if self.method_generate == 'sample':
-                new_ys = [self._get_samples(x, y, self.n_generate_sample, stop=stop_signs[step]) for y in ys]
+                new_ys = []
+                for y in ys:
+                    new_ys.append((yield from self._get_samples(x, y, self.n_generate_sample, stop=stop_signs[step])))
                 query_list += [query[1] for query in new_ys]
                 new_ys = [new_y[0] for new_y in new_ys]
 
@@ -52,7 +73,7 @@ class ToTAgent(BaseAgent):
             # evaluation
             x = self.construct_init_messages(system_prompt, observation_prompt)
             if self.method_evaluate == 'vote':
-                values, query = self._vote(x, new_ys, self.n_evaluate_sample, voting_prompt, voting_regex)
+                values, query = yield from self._vote(x, new_ys, self.n_evaluate_sample, voting_prompt, voting_regex)
                 query_list.append(query)
             else:
                 raise NotImplementedError
@@ -74,7 +95,7 @@ class ToTAgent(BaseAgent):
         messages[-1]['content'] += '\n' + y
         self.logger.info('Thought/Action Prompt:')
         self.logger.info(messages[-1]['content'])
-        responses, query = self.llm_query(messages, n=n_generate_sample, stop=stop, prompt_type='plan')
+        responses, query = yield (messages, n_generate_sample, stop, 'plan')
         self.logger.info('Thought/Action Response:')
         self.logger.info(responses)
         return responses, query
@@ -87,7 +108,7 @@ class ToTAgent(BaseAgent):
         messages[-1]['content'] += '\n' + voting_prompt
         self.logger.info('Voting Prompt:')
         self.logger.info(messages[-1]['content'])
-        responses, query = self.llm_query(messages, n=n_evaluation_sample, stop=None, prompt_type='vote')
+        responses, query = yield (messages, n_evaluation_sample, None, 'vote')
         self.logger.info('Voting Response:')
         self.logger.info(responses)
         votes = self.parse_with_regex(responses, regex=voting_regex)
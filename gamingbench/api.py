@@ -0,0 +1,114 @@
+import argparse
+import queue
+import threading
+
+from gamingbench import main
+
+
+class MatchResult:
+    '''
+    Summary of one finished match. The full history is in the run's result
+    file once the experiment is over.
+    '''
+
+    def __init__(self, run_key, result_path, summary) -> None:
+        self.run_key = run_key
+        self.result_path = result_path
+        self.summary = summary
+        self.match_key = summary['match_key']
+        self.status = summary['status']
+        self.winner = summary['winner']
+        self.entrant_score = summary['entrant_score']
+        self.weight = summary['weight']
+        self.token_size = summary['token_size']
+        self.duration_seconds = summary['duration_seconds']
+        # 'match' or 'run' with the error of a match that raised
+        self.failure = summary['failure']
+        self.error = summary['error']
+
+    def to_dict(self):
+        return {'run_key': self.run_key, 'result_path': self.result_path, **self.summary}
+
+    def __repr__(self):
+        return f'MatchResult({self.run_key}, {self.match_key}, {self.status}, winner={self.winner!r})'
+
+
+def experiment_spec(**options):
+    '''
+    Options of an experiment: the main.py command line options (with
+    underscores) given here, the defaults of main.py for the others.
+    '''
+    spec = main.get_args([])
+    spec.exp_root = None
+    for key, value in options.items():
+        if not hasattr(spec, key):
+            raise ValueError(f'unknown experiment option {key}')
+        setattr(spec, key, value)
+    main.set_default_exp_root(spec)
+    if spec.entrants:
+        spec.exchange_first_player = True
+        spec.resume = True
+    return spec
+
+
+def run_experiment(spec, cancel=None):
+    '''
+    Play an experiment and yield a MatchResult for every match as it
+    finishes. `spec` is an `experiment_spec` (or a dict of its options).
+    Setting the `cancel` event, or closing the iterator, stops launching
+    matches; running ones get the spec's grace period to finish and the
+    finished ones are kept, as after SIGINT on the command line. Several
+    experiments can run in one process, each with its own worker pool.
+    '''
+    if isinstance(spec, dict):
+        spec = experiment_spec(**spec)
+    elif not isinstance(spec, argparse.Namespace):
+        raise TypeError('spec must be an experiment_spec or a dict of its options')
+    if spec.dry_run or spec.role == 'worker':
+        raise ValueError('dry runs and job queue workers are not experiments')
+    if spec.api_keys:
+        main.set_api_keys(spec.api_keys)
+    # recorded in the run manifest, so that --resume-from can finish the experiment
+    spec.argv = main.options_to_argv(spec)
+
+    scheduler, result_paths, cell_runs = main.start_experiment(spec)
+    results = queue.Queue()
+    finished = object()
+    handler = scheduler.result_handler
+
+    def forward(result):
+        if handler is not None:
+            handler(result)
+        results.put(result)
+
+    def play():
+        try:
+            scheduler.run()
+            main.finish_experiment(scheduler, spec, result_paths, cell_runs)
+        except Exception as e:
+            results.put(e)
+        finally:
+            results.put(finished)
+
+    scheduler.result_handler = forward
+    thread = threading.Thread(target=play, daemon=True)
+    thread.start()
+    try:
+        while True:
+            if cancel is not None and cancel.is_set() and scheduler.drain_reason is None:
+                scheduler.request_drain('cancelled')
+            try:
+                item = results.get(timeout=1)
+            except queue.Empty:
+                continue
+            if item is finished:
+                return
+            if isinstance(item, Exception):
+                raise item
+            summary, params = item
+            yield MatchResult(params['run_key'], params['result_path'], summary)
+    finally:
+        if thread.is_alive():
+            if scheduler.drain_reason is None:
+                scheduler.request_drain('cancelled')
+            thread.join()
@@ -1,6 +1,5 @@
 
 import os
-from langchain.schema import SystemMessage, HumanMessage, AIMessage
 
 
 def estimate_tokens(text, model_name="gpt-3.5-turbo"):  # noqa: ARG001
@@ -33,6 +32,7 @@ def chat_llm(  # noqa
     return_tokens=False,
     chat_seed=0,
     model_kwargs=None,  # New parameter for additional model configuration
+    chat=None,
 ):
     """Unified chat interface across providers (OpenAI, NVIDIA, Anyscale, DeepInfra).
 
@@ -47,11 +47,61 @@ def chat_llm(  # noqa
     - return_tokens: unused flag kept for API compatibility
     - chat_seed: unused, kept for compatibility
     - model_kwargs: dict of additional model-specific parameters (e.g., reasoning settings)
+    - chat: client from build_chat for these parameters, reused instead of building a new one
     """
+    if chat is None:
+        chat, _ = build_chat(model, temperature, max_tokens, n, timeout, model_kwargs)
+    iterated_query = is_iterated_query(model)
+    longchain_msgs = to_langchain_messages(messages)
+    num_calls = n if n > 1 and iterated_query else 1
+    # Use non-streaming generate() for all models (gpt-oss-20b included)
+    llm_results = [chat.generate([longchain_msgs], stop=[stop] if stop is not None else None)
+                   for _ in range(num_calls)]
+    return collect_generations(llm_results, messages, iterated=num_calls > 1)
+
+
+async def achat_llm(  # noqa
+    messages,
+    model,
+    temperature,
+    max_tokens,
+    n,  # noqa: N803
+    timeout,
+    stop,
+    return_tokens=False,
+    chat_seed=0,
+    model_kwargs=None,
+    chat=None,
+):
+    """Asynchronous version of chat_llm; awaits the provider instead of blocking a thread."""
+    if chat is None:
+        chat, _ = build_chat(model, temperature, max_tokens, n, timeout, model_kwargs)
+    iterated_query = is_iterated_query(model)
+    longchain_msgs = to_langchain_messages(messages)
+    num_calls = n if n > 1 and iterated_query else 1
+    llm_results = []
+    for _ in range(num_calls):
+        llm_results.append(await chat.agenerate(
+            [longchain_msgs], stop=[stop] if stop is not None else None))
+    return collect_generations(llm_results, messages, iterated=num_calls > 1)
+
+
+def is_iterated_query(model):
+    """Whether n>1 generations of `model` take n requests instead of one."""
+    if model.endswith("gpt-oss-20b") or model.endswith("gpt-oss-120b"):
+        return True
+    return "gpt" not in model
+
+
+def build_chat(model, temperature, max_tokens, n, timeout, model_kwargs=None):
+    """Create the LangChain chat client for a model.
+
+    Returns the client and whether n>1 generations have to be requested one by one.
+    """
+    iterated_query = is_iterated_query(model)
     # Ruta NVIDIA primero para evitar colisiones con el patrón "gpt" genérico
     if model == "openai/gpt-oss-20b" or model.endswith("gpt-oss-20b"):
         # Use non-streaming generate() for GPT-OSS-20B
-        iterated_query = True
         resolved_model = model if "/" in model else "openai/gpt-oss-20b"
         module = __import__('langchain_nvidia_ai_endpoints', fromlist=['ChatNVIDIA'])
         chat_nvidia_cls = getattr(module, 'ChatNVIDIA')
@@ -76,7 +126,6 @@ def chat_llm(  # noqa
             model_kwargs=default_kwargs,
         )
     elif (model == "openai/gpt-oss-120b" or model.endswith("gpt-oss-120b")):
-        iterated_query = True  # si n>1, iteramos manualmente
         resolved_model = model if "/" in model else "openai/gpt-oss-120b"
         # Import dinámico para evitar dependencias innecesarias al importar el módulo
         module = __import__('langchain_nvidia_ai_endpoints', fromlist=['ChatNVIDIA'])
@@ -90,7 +139,6 @@ def chat_llm(  # noqa
             # request_timeout=timeout,  # descomentar si tu versión lo soporta
         )
     elif "gpt" in model:
-        iterated_query = False
         # gpt-5 requires max_completion_tokens instead of max_tokens
         is_gpt5 = model.startswith("gpt-5") or model == "gpt-5"
         chat_kwargs = dict(
@@ -112,7 +160,6 @@ def chat_llm(  # noqa
         chat_openai_cls = getattr(module, 'ChatOpenAI')
         chat = chat_openai_cls(**chat_kwargs)
     elif 'Open-Orca/Mistral-7B-OpenOrca' == model:
-        iterated_query = True
         module = __import__('langchain_community.chat_models', fromlist=['ChatAnyscale'])
         chat_anyscale_cls = getattr(module, 'ChatAnyscale')
         chat = chat_anyscale_cls(
@@ -125,7 +172,6 @@ def chat_llm(  # noqa
         )
     else:
         # deepinfra
-        iterated_query = True
         module = __import__('langchain_openai', fromlist=['ChatOpenAI'])
         chat_openai_cls = getattr(module, 'ChatOpenAI')
         chat = chat_openai_cls(
@@ -138,6 +184,12 @@ def chat_llm(  # noqa
             openai_api_base="https://api.deepinfra.com/v1/openai",
         )
 
+    return chat, iterated_query
+
+
+def to_langchain_messages(messages):
+    # imported on first use, langchain takes most of the package import time
+    from langchain.schema import SystemMessage, HumanMessage, AIMessage
     longchain_msgs = []
     for msg in messages:
         if msg['role'] == 'system':
@@ -148,80 +200,54 @@ def chat_llm(  # noqa
             longchain_msgs.append(AIMessage(content=msg['content']))
         else:
             raise NotImplementedError
-    if n > 1 and iterated_query:
-        response_list = []
-        total_completion_tokens = 0
-        total_prompt_tokens = 0
-        for i in range(n):
-            # Use non-streaming generate() for all models (gpt-oss-20b included)
-            generations = chat.generate(
-                [longchain_msgs],
-                stop=[stop] if stop is not None else None,
-            )
-            responses = [chat_gen.message.content for chat_gen in generations.generations[0]]
-            
-            response_list.append(responses[0])
-            
-            # Manejar diferentes formatos de token_usage según el proveedor
-            if generations.llm_output:
-                if 'token_usage' in generations.llm_output:
-                    token_usage = generations.llm_output['token_usage']
-                elif 'usage' in generations.llm_output:
-                    token_usage = generations.llm_output['usage']
-                else:
-                    token_usage = {}
-            else:
-                token_usage = {}
-            
-            completion_tokens = token_usage.get('completion_tokens', 0)
-            prompt_tokens = token_usage.get('prompt_tokens', 0)
-            
-            # Si no hay información de tokens, estimarlos manualmente para esta iteración
-            if completion_tokens == 0 and prompt_tokens == 0:
-                # Estimar prompt tokens de todos los mensajes
-                prompt_text = ""
-                for msg in messages:
-                    prompt_text += msg.get('content', '')
-                prompt_tokens = estimate_tokens(prompt_text)
-                
-                # Estimar completion tokens de la respuesta actual
-                completion_tokens = estimate_tokens(responses[0])
-            
-            total_completion_tokens += completion_tokens
-            total_prompt_tokens += prompt_tokens
-        responses = response_list
-        completion_tokens = total_completion_tokens
-        prompt_tokens = total_prompt_tokens
-    else:
-        # Use non-streaming generate() for all models
-        generations = chat.generate(
-            [longchain_msgs],
-            stop=[stop] if stop is not None else None,
-        )
-        responses = [chat_gen.message.content for chat_gen in generations.generations[0]]
-        
-        # Manejar diferentes formatos de token_usage según el proveedor
-        if generations.llm_output:
-            if 'token_usage' in generations.llm_output:
-                token_usage = generations.llm_output['token_usage']
-            elif 'usage' in generations.llm_output:
-                token_usage = generations.llm_output['usage']
-            else:
-                token_usage = {}
+    return longchain_msgs
+
+
+def get_token_usage(generations):
+    # Manejar diferentes formatos de token_usage según el proveedor
+    if generations.llm_output:
+        if 'token_usage' in generations.llm_output:
+            token_usage = generations.llm_output['token_usage']
+        elif 'usage' in generations.llm_output:
+            token_usage = generations.llm_output['usage']
         else:
             token_usage = {}
-        
-        completion_tokens = token_usage.get('completion_tokens', 0)
-        prompt_tokens = token_usage.get('prompt_tokens', 0)
+    else:
+        token_usage = {}
+    return token_usage.get('completion_tokens', 0), token_usage.get('prompt_tokens', 0)
+
+
+def estimate_prompt_tokens(messages):
+    # Estimar prompt tokens de todos los mensajes
+    prompt_text = ""
+    for msg in messages:
+        prompt_text += msg.get('content', '')
+    return estimate_tokens(prompt_text)
+
+
+def collect_generations(llm_results, messages, iterated=False):
+    """Merge the LLMResults of one or more generate() calls into the chat_llm output."""
+    responses = []
+    completion_tokens = 0
+    prompt_tokens = 0
+    for generations in llm_results:
+        contents = [chat_gen.message.content for chat_gen in generations.generations[0]]
+        call_completion_tokens, call_prompt_tokens = get_token_usage(generations)
+        if iterated:
+            responses.append(contents[0])
+            # Si no hay información de tokens, estimarlos manualmente para esta iteración
+            if call_completion_tokens == 0 and call_prompt_tokens == 0:
+                call_prompt_tokens = estimate_prompt_tokens(messages)
+                call_completion_tokens = estimate_tokens(contents[0])
+        else:
+            responses.extend(contents)
+        completion_tokens += call_completion_tokens
+        prompt_tokens += call_prompt_tokens
 
     # Si no hay información de tokens, estimarlos manualmente
     if completion_tokens == 0 and prompt_tokens == 0:
-        # Estimar prompt tokens de todos los mensajes
-        prompt_text = ""
-        for msg in messages:
-            prompt_text += msg.get('content', '')
-        prompt_tokens = estimate_tokens(prompt_text)
-        
+        prompt_tokens = estimate_prompt_tokens(messages)
+
         # Estimar completion tokens de las respuestas
         completion_text = ""
         for response in responses:
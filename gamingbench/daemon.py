@@ -0,0 +1,271 @@
+import argparse
+import concurrent.futures
+import itertools
+import json
+import os
+import pathlib
+import re
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from gamingbench import main
+from gamingbench.utils import utils
+from gamingbench.utils.scheduler import MatchScheduler, SchedulerUnavailable
+
+# main.py options the daemon decides for all experiments, or cannot serve;
+# they must keep their main.py defaults
+UNSUPPORTED_OPTIONS = ['entrants', 'sweep', 'job_queue', 'dry_run', 'executor', 'num_workers']
+# seconds a submission waits for the scheduling thread to pick it up
+SUBMIT_TIMEOUT = 30
+
+
+class Experiment:
+    '''The runs of one submitted main.py command line.'''
+
+    def __init__(self, exp_id, argv, args) -> None:
+        self.exp_id = exp_id
+        self.argv = argv
+        self.args = args
+        self.submitted = time.strftime('%Y-%m-%d %H:%M:%S')
+        # run key -> result path
+        self.runs = {}
+        self.done = False
+
+    def to_dict(self, progress):
+        return {
+            'id': self.exp_id,
+            'argv': self.argv,
+            'submitted': self.submitted,
+            'done': self.done,
+            'runs': {run_key: {**progress[run_key].to_dict(), 'result_path': result_path}
+                     for run_key, result_path in self.runs.items()}
+        }
+
+
+class BenchDaemon:
+    '''
+    Long-running benchmark service. Experiments are main.py command lines
+    whose runs are added to one shared scheduler, so they share its workers
+    and the per-process caches of run plans, agent pools (with their model
+    clients and MCTS bots) and loaded games stay warm between experiments.
+    '''
+
+    def __init__(self, num_workers, grace_period=60) -> None:
+        self.scheduler = MatchScheduler(main.run_match, num_workers=num_workers,
+                                        result_handler=self.on_result, grace_period=grace_period)
+        self.experiments = {}
+        self.run_experiments = {}
+        self.ids = itertools.count(1)
+        # notified whenever a match of any experiment finishes
+        self.changed = threading.Condition()
+
+    def submit(self, argv):
+        args = main.get_args(argv)
+        defaults = main.get_parser()
+        for option in UNSUPPORTED_OPTIONS:
+            if getattr(args, option) != defaults.get_default(option):
+                raise ValueError(f'--{option.replace("_", "-")} is not supported by the daemon')
+        if len(args.agent_configs) != 2 or len(args.model_configs) != 2:
+            raise ValueError('two --agent-configs and two --model-configs are required')
+        experiment = Experiment(f'{next(self.ids):04d}', argv, args)
+
+        def register():
+            # the shards of a result file are merged when a run is added, which
+            # must not happen while another experiment's matches write to them
+            busy = {os.path.abspath(path) for e in self.experiments.values() if not e.done
+                    for path in e.runs.values()}
+            for game_name in args.game_names:
+                result_path = main.get_result_path(
+                    game_name, args.agent_configs, args.model_configs, args)
+                if os.path.abspath(result_path) in busy:
+                    raise ValueError(f'{result_path} is written by an unfinished experiment')
+            for game_name in args.game_names:
+                run_key, result_path = main.run_game(
+                    game_name, self.scheduler, args.agent_configs, args.model_configs,
+                    run_args=args, key_prefix=f'{experiment.exp_id}/')
+                experiment.runs[run_key] = result_path
+                self.run_experiments[run_key] = experiment
+            with self.changed:
+                self.experiments[experiment.exp_id] = experiment
+            self.check_done(experiment)
+
+        # runs are only added by the scheduling thread
+        future = self.scheduler.call_soon(register)
+        try:
+            future.result(timeout=SUBMIT_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            if future.cancel():
+                raise SchedulerUnavailable(
+                    f'scheduler did not accept the experiment within {SUBMIT_TIMEOUT}s')
+            # the runs are being registered, they are not lost
+            future.result()
+        return experiment
+
+    def on_result(self, result):
+        _, params = result
+        experiment = self.run_experiments[params['run_key']]
+        self.check_done(experiment)
+        with self.changed:
+            self.changed.notify_all()
+
+    def check_done(self, experiment):
+        progress = self.scheduler.progress
+        if experiment.done or not all(progress[k].done for k in experiment.runs):
+            return
+        self.finish(experiment)
+
+    def finish(self, experiment):
+        logger = utils.LLMBenchLogger(None)
+        for run_key, result_path in experiment.runs.items():
+            main.merge_live_results(self.scheduler, result_path, run_key, logger)
+            main.save_game_summary(self.scheduler.progress[run_key], result_path)
+        with self.changed:
+            experiment.done = True
+            self.changed.notify_all()
+        logger.info(f'experiment {experiment.exp_id} finished')
+
+    def status(self, exp_id=None):
+        with self.changed:
+            if exp_id is None:
+                return [e.to_dict(self.scheduler.progress) for e in self.experiments.values()]
+            return self.experiments[exp_id].to_dict(self.scheduler.progress)
+
+    def stream_results(self, exp_id, timeout=1):
+        '''Yield the match summaries of an experiment as they finish, until it is done.'''
+        experiment = self.experiments[exp_id]
+        sent = {run_key: 0 for run_key in experiment.runs}
+        while True:
+            with self.changed:
+                done = experiment.done or self.scheduler.drain_reason is not None
+                new = []
+                for run_key in experiment.runs:
+                    summaries = self.scheduler.progress[run_key].summaries
+                    new += [{'run_key': run_key, **s} for s in summaries[sent[run_key]:]]
+                    sent[run_key] = len(summaries)
+                if not new and not done:
+                    self.changed.wait(timeout)
+            yield from new
+            if done and not new:
+                return
+
+    def serve(self):
+        main.install_drain_handlers(self.scheduler)
+        self.scheduler.serve()
+        # experiments cut short keep their finished matches
+        for experiment in self.experiments.values():
+            if not experiment.done:
+                self.finish(experiment)
+
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    '''
+    POST /experiments            {"argv": [...]} -> the new experiment
+    GET  /experiments            every experiment with its runs' progress
+    GET  /experiments/<id>       one experiment
+    GET  /experiments/<id>/results
+                                 JSON lines of match summaries, streamed as
+                                 matches finish until the experiment is done
+    '''
+    daemon = None
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/experiments':
+            return self.send_json(404, {'error': f'unknown path {self.path}'})
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            experiment = self.daemon.submit(list(body['argv']))
+        except SystemExit:
+            return self.send_json(400, {'error': 'invalid main.py arguments'})
+        except SchedulerUnavailable as e:
+            return self.send_json(503, {'error': str(e)})
+        except Exception as e:
+            return self.send_json(400, {'error': str(e)})
+        self.send_json(200, self.daemon.status(experiment.exp_id))
+
+    def do_GET(self):
+        path = self.path.rstrip('/')
+        if path == '/experiments':
+            return self.send_json(200, self.daemon.status())
+        match = re.fullmatch(r'/experiments/([^/]+)(/results)?', path)
+        if match is None or match.group(1) not in self.daemon.experiments:
+            return self.send_json(404, {'error': f'unknown path {self.path}'})
+        exp_id = match.group(1)
+        if match.group(2) is None:
+            return self.send_json(200, self.daemon.status(exp_id))
+        # no content length: the stream ends when the connection closes
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        for summary in self.daemon.stream_results(exp_id):
+            self.wfile.write((json.dumps(summary) + '\n').encode())
+            self.wfile.flush()
+
+    def send_json(self, code, obj):
+        data = json.dumps(obj, indent=2).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # unix socket clients have no address
+        return str(self.client_address[0]) if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        utils.LLMBenchLogger(None).info(f'{self.address_string()} {format % args}')
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ('unix', 0)
+
+
+def get_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark daemon serving main.py experiments')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--socket', type=str, default=None,
+                        help='Listen on this Unix socket instead of --host/--port')
+    parser.add_argument('--num-workers', default=4, type=int,
+                        help='Matches played at once across all experiments')
+    parser.add_argument('--grace-period', default=60, type=float)
+    parser.add_argument('--log-path', type=str, default='../experiments/daemon.log')
+    return parser.parse_args(argv)
+
+
+def serve(args):
+    pathlib.Path(os.path.dirname(os.path.abspath(args.log_path))).mkdir(parents=True, exist_ok=True)
+    logger = utils.LLMBenchLogger(args.log_path)
+
+    daemon = BenchDaemon(args.num_workers, grace_period=args.grace_period)
+    DaemonRequestHandler.daemon = daemon
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+        server = UnixHTTPServer(args.socket, DaemonRequestHandler)
+        address = args.socket
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), DaemonRequestHandler)
+        server.daemon_threads = True
+        address = f'http://{args.host}:{server.server_address[1]}'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f'daemon listening on {address} with {args.num_workers} workers')
+    try:
+        daemon.serve()
+    finally:
+        server.shutdown()
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+    logger.info('daemon stopped')
+
+
+if __name__ == '__main__':
+    serve(get_args())
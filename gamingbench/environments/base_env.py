@@ -46,6 +46,11 @@ class BaseGameEnv(object):
                            self.history_tracker)
         pass
 
+    async def aplay(self):
+        if self.game:
+            await self.game.aplay(self.agent_list, self.model_list,
+                                  self.history_tracker)
+
     def reset(self):
         if self.game:
             self.game.reset()
@@ -1,10 +1,14 @@
-from gamingbench.games.tic_tac_toe import TicTacToe
-from gamingbench.games.connect_four import ConnectFour
-from gamingbench.games.breakthrough import Breakthrough
-from gamingbench.games.first_sealed_auction import FirstSealedAuction
-from gamingbench.games.liars_dice import LiarsDice
-from gamingbench.games.negotiation import Negotiation
-from gamingbench.games.nim import Nim
-from gamingbench.games.pig import Pig
-from gamingbench.games.kuhn_poker import KuhnPoker
-from gamingbench.games.prisoners_dilemma import PrisonersDilemma
+from gamingbench.utils.lazy import lazy_classes
+
+__getattr__ = lazy_classes(__name__, {
+    'TicTacToe': 'gamingbench.games.tic_tac_toe',
+    'ConnectFour': 'gamingbench.games.connect_four',
+    'Breakthrough': 'gamingbench.games.breakthrough',
+    'FirstSealedAuction': 'gamingbench.games.first_sealed_auction',
+    'LiarsDice': 'gamingbench.games.liars_dice',
+    'Negotiation': 'gamingbench.games.negotiation',
+    'Nim': 'gamingbench.games.nim',
+    'Pig': 'gamingbench.games.pig',
+    'KuhnPoker': 'gamingbench.games.kuhn_poker',
+    'PrisonersDilemma': 'gamingbench.games.prisoners_dilemma',
+})
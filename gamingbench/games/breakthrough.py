@@ -1,6 +1,5 @@
 
 import random
-import copy
 import pyspiel
 import numpy as np
 from gamingbench.utils import utils
@@ -16,17 +15,24 @@ class Breakthrough(OpenSpielGame):
         self.env = self.game.new_initial_state()
         pass
 
-    def openspiel_action_to_agent(self, action):
-        actions = [f'<{a[:2]}->{a[2:]}>' for a in action]
-        return actions
-        pass
+    def format_action(self, action_string):
+        return f'<{action_string[:2]}->{action_string[2:]}>'
+
+    def read_observation(self, player_idx):
+        # black, white and empty planes of rows x columns cells, top row first
+        _, rows, columns = self.game.observation_tensor_shape()
+        tensor = self.env.observation_tensor(player_idx)
+        size = rows * columns
+        cells = ''.join('b' if b else 'w' if w else '.' for b, w in zip(tensor[:size], tensor[size:2 * size]))
+        board = [f'{rows - r}{cells[r * columns:(r + 1) * columns]}' for r in range(rows)]
+        return {'board': board}
 
-    def openspiel_observation_to_dict(self, current_player_idx, openspiel_obs):
+    def openspiel_observation_to_dict(self, current_player_idx):
         opponent_idx = 1 if current_player_idx == 0 else 0
-        board_preview = str(str(self.env).split('\n')[:-2])
+        board_preview = str(self.observe(current_player_idx)['board'])
         res = {
-            'opponent_moves': copy.deepcopy(self.quick_action_memory_for_llm.get(opponent_idx, [])),
-            'self_moves': copy.deepcopy(self.quick_action_memory_for_llm.get(current_player_idx, [])),
+            'opponent_moves': self.get_moves(opponent_idx),
+            'self_moves': self.get_moves(current_player_idx),
             'board': board_preview
         }
         return res
@@ -55,6 +61,15 @@ class Breakthrough(OpenSpielGame):
         return action
 
     def agent_action_to_openspiel(self, action):
+        game_action = self.codec.to_openspiel(action)
+        if game_action is None:
+            return self.parse_agent_action(action)
+        if game_action not in self.step_legal_actions:
+            # the same move with the capture flag flipped
+            game_action ^= 1
+        return game_action
+
+    def parse_agent_action(self, action):
         try:
             action = action.replace('-', '')
             action = action.replace('>', '')
@@ -72,7 +87,7 @@ class Breakthrough(OpenSpielGame):
                     break
             real_values = [r1, c1, dir, 1 if action.__contains__('*') else 0]
             game_action = self.rank_action_mixed_base(real_values)
-            legal_actions = self.env.legal_actions(self.env.current_player())
+            legal_actions = self.step_legal_actions
             if game_action in legal_actions:
                 return game_action
             else:
@@ -1,5 +1,4 @@
 
-import copy
 from gamingbench.games.openspiel_adapter import OpenSpielGame
 import re
 
@@ -10,22 +9,19 @@ class ConnectFour(OpenSpielGame):
         self.game_name = 'connect4'
         pass
 
-    def openspiel_action_to_agent(self, action):
+    def format_action(self, action_string):
+        return f'<C{int(action_string[1]) + 1}>'
 
-        actions = [f'<C{int(a[1]) + 1}>' for a in action]
-        return actions
-        pass
-
-    def openspiel_observation_to_dict(self, current_player_idx, openspiel_obs):
+    def openspiel_observation_to_dict(self, current_player_idx):
         opponent_idx = 1 if current_player_idx == 0 else 0
         res = {
-            'opponent_moves': copy.deepcopy(self.quick_action_memory_for_llm.get(opponent_idx, [])),
-            'self_moves': copy.deepcopy(self.quick_action_memory_for_llm.get(current_player_idx, [])),
+            'opponent_moves': self.get_moves(opponent_idx),
+            'self_moves': self.get_moves(current_player_idx),
         }
         return res
         pass
 
-    def agent_action_to_openspiel(self, action):
+    def parse_agent_action(self, action):
         try:
             regex = r"\s*(\d+)\s*"
             numbers_match = re.findall(
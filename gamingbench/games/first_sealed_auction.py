@@ -2,7 +2,7 @@ import numpy as np
 from typing import List
 from gamingbench.utils.history_tracker import GameMatch, Step
 from gamingbench.utils import utils
-from gamingbench.games.openspiel_adapter import OpenSpielGame
+from gamingbench.games.openspiel_adapter import OpenSpielGame, decode_one_hot
 
 
 class FirstSealedAuction(OpenSpielGame):
@@ -10,31 +10,27 @@ class FirstSealedAuction(OpenSpielGame):
         super().__init__("first_sealed_auction")
         pass
 
-    def openspiel_action_to_agent(self, action):
-        agent_action_list = [a.split(' ')[-1] for a in action]
-        agent_action_list = [f'<{a}>' for a in agent_action_list]
-        return agent_action_list
+    def format_action(self, action_string):
+        return f'<{action_string.split(" ")[-1]}>'
 
-    def openspiel_observation_to_dict(self, current_player_idx, openspiel_obs):
+    def read_observation(self, player_idx):
+        # one-hot of the valuation, starting at 1
+        tensor = self.env.observation_tensor(player_idx)
+        return {'valuation': float(decode_one_hot(tensor, len(tensor))[0] + 1)}
+
+    def openspiel_observation_to_dict(self, current_player_idx):
         return {
-            'valuation': float(self.env.observation_string())
+            'valuation': self.observe(current_player_idx)['valuation']
         }
 
     def agent_action_to_openspiel(self, action):
         try:
-            bid = int(action[1:-1])
-            legal_actions = self.env.legal_actions(self.env.current_player())
-            legal_actions = [int(l) for l in legal_actions]
-            if bid in legal_actions:
-                return bid
-            distance = float('inf')
-            ans = bid
-            for i in legal_actions:
-                d = abs(i-bid)
-                if d <= distance:
-                    distance = d
-                    ans = i
-            return ans
+            bid = self.codec.to_openspiel(action)
+            if bid is None:
+                bid = int(action[1:-1])
+            # the legal bids are 0 up to the valuation, the nearest one is played
+            legal_actions = self.step_legal_actions
+            return min(max(bid, legal_actions[0]), legal_actions[-1])
         except Exception as e:
             self.logger.info("Unsuccessful interpreting LLM move")
             self.logger.info(action)
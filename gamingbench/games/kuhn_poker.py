@@ -1,6 +1,6 @@
 
 
-from gamingbench.games.openspiel_adapter import OpenSpielGame
+from gamingbench.games.openspiel_adapter import OpenSpielGame, decode_one_hot
 
 
 class KuhnPoker(OpenSpielGame):
@@ -9,27 +9,23 @@ class KuhnPoker(OpenSpielGame):
         super().__init__("kuhn_poker")
         pass
 
-    def openspiel_observation_to_dict(self, current_player_idx, openspiel_obs):
-
-        state = str(self.env).split(' ')
-        print(state)
+    def read_observation(self, player_idx):
+        # player and card one-hots, then the contributions to the pot
+        num_players = self.game.num_players()
+        tensor = self.env.observation_tensor(player_idx)
+        card = decode_one_hot(tensor[num_players:num_players * 2 + 1], num_players + 1)[0]
+        # the deal, then one pass (0) or bet (1) per turn
+        moves = ''.join('pb'[a] for a in self.env.history()[num_players:])
+        return {'card': card, 'moves': moves or None}
+
+    def openspiel_observation_to_dict(self, current_player_idx):
+        observation = self.observe(current_player_idx)
         observations = {
-            'card': state[current_player_idx],
-            'moves': state[-1] if (state[-1] != '0' and state[-1] != '1' and state[-1] != '2') else None,
+            'card': observation['card'],
+            'moves': observation['moves'],
             'player_idx': current_player_idx
         }
         return observations
 
-    def openspiel_action_to_agent(self, action):
-        return [f'<{a}>' for a in action]
-
-    def agent_action_to_openspiel(self, action):
-        if action == '<Pass>':
-            return 0
-        elif action == '<Bet>':
-            return 1
-        else:
-            # TODO: illegal action
-            self.logger.info("Unsuccessful interpreting LLM move")
-            self.logger.info(action)
-            return None
+    def format_action(self, action_string):
+        return f'<{action_string}>'
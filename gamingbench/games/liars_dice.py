@@ -2,7 +2,7 @@ import numpy as np
 from typing import List
 from gamingbench.utils.history_tracker import GameMatch, Step
 from gamingbench.utils import utils
-from gamingbench.games.openspiel_adapter import OpenSpielGame
+from gamingbench.games.openspiel_adapter import OpenSpielGame, decode_one_hot
 
 # Note: the action is comprised of two parts, the quantity and face value, written as q-v
 
@@ -10,6 +10,7 @@ from gamingbench.games.openspiel_adapter import OpenSpielGame
 class LiarsDice(OpenSpielGame):
     def __init__(self) -> None:
         super().__init__("liars_dice")
+        self.dice_sides = self.game.get_parameters()['dice_sides']
         pass
 
     def extract_quantity_and_face_value(self, text):
@@ -26,26 +27,41 @@ class LiarsDice(OpenSpielGame):
             a = f'<{x} dices, {y} value>'
         return a
 
-    def openspiel_action_to_agent(self, action):
-        new_actions = []
-        for a in action:
-            new_actions.append(self.cvt_to_agent_action(a))
-        return new_actions
+    def format_action(self, action_string):
+        return self.cvt_to_agent_action(action_string)
 
-    def openspiel_observation_to_dict(self, current_player_idx, openspiel_obs):
+    def agent_action_aliases(self):
+        # the move regex also accepts the singular
+        return {a.replace('dices', 'dice'): action_id
+                for action_id, a in enumerate(self.agent_action_table()) if 'dices' in a}
+
+    def read_observation(self, player_idx):
+        # player one-hot, then the one-hot face of the player's (single) die
+        num_players = self.game.num_players()
+        tensor = self.env.observation_tensor(player_idx)
+        face = decode_one_hot(tensor[num_players:num_players + self.dice_sides], self.dice_sides)[0]
+        # the dice are dealt by the first chance actions, then come the bids
+        history = self.env.history()
+        last_action = history[-1] if len(history) > num_players else None
+        liar = self.game.num_distinct_actions() - 1
+        return {
+            'dice_face_value': face + 1,
+            'last_move': self.codec.agent_actions[last_action] if last_action not in (None, liar) else None
+        }
+
+    def openspiel_observation_to_dict(self, current_player_idx):
         opponent_idx = 1 if current_player_idx == 0 else 0
-        obs = openspiel_obs.split(' ')
 
         res = {
-            'opponent_moves': self.quick_action_memory_for_llm.get(opponent_idx, []),
-            'self_moves': self.quick_action_memory_for_llm.get(current_player_idx, []),
-            'self_dice_face_value': obs[current_player_idx],
-            'opponent_dice_face_value': obs[0 if current_player_idx == 1 else 1],
-            'last_move': self.cvt_to_agent_action(obs[-1]) if '-' in obs[-1] else None
+            'opponent_moves': self.get_moves(opponent_idx),
+            'self_moves': self.get_moves(current_player_idx),
+            'self_dice_face_value': self.observe(current_player_idx)['dice_face_value'],
+            'opponent_dice_face_value': self.observe(opponent_idx)['dice_face_value'],
+            'last_move': self.observe(current_player_idx)['last_move']
         }
         return res
 
-    def agent_action_to_openspiel(self, action):
+    def parse_agent_action(self, action):
         try:
             action = action.replace('<', '')
             action = action.replace('>', '')
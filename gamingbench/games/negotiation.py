@@ -2,75 +2,87 @@ import numpy as np
 from typing import List
 from gamingbench.utils.history_tracker import GameMatch, Step
 from gamingbench.utils import utils
-from gamingbench.games.openspiel_adapter import OpenSpielGame
+from gamingbench.games.openspiel_adapter import ActionCodec, OpenSpielGame, decode_one_hot
 import re
 
+# kDefaultNumItems=3, kMaxQuantity=5, kDefaultNumSymbols=5
+NUM_ITEMS = 3
+MAX_QUANTITY = 5
+MAX_VALUE = 10
+NUM_SYMBOLS = 5
+NUM_PROPOSALS = int(pow(6, 3))
+TURN_TYPES = ['Proposal', 'Utterance']
+
 
 class Negotiation(OpenSpielGame):
     def __init__(self) -> None:
         super().__init__("negotiation")
         pass
 
-    def openspiel_action_to_agent(self, action):
+    def agent_action_table(self):
+        # the action strings of OpenSpiel depend on the turn, so the ids are
+        # decoded here: proposals, agree, then utterances
+        # TODO: default item pool is [5, 5, 5]
+        agent_actions = []
+        for a in range(6):
+            for b in range(6):
+                for c in range(6):
+                    agent_actions.append(f'<Proposal: [{a}, {b}, {c}]>')
+        agent_actions.append(f'<Agree>')
+        for a in range(5):
+            for b in range(5):
+                for c in range(5):
+                    agent_actions.append(f'<Utterance: [{a}, {b}, {c}]>')
+        return agent_actions
+
+    def openspiel_action_to_agent(self, action_ids):
+        # every move of the turn type is listed, not only the legal ones
         turn_type = self.get_turn_type()
         if turn_type == 'Proposal':
-            agent_actions = []
-            # TODO: default item pool is [5, 5, 5]
-            for a in range(6):
-                for b in range(6):
-                    for c in range(6):
-                        agent_actions.append(f'<Proposal: [{a}, {b}, {c}]>')
-            agent_actions.append(f'<Agree>')
-
+            return list(self.codec.agent_actions[:NUM_PROPOSALS + 1])
         elif turn_type == 'Utterance':
-            agent_actions = []
-            # TODO: default item pool is [5, 5, 5]
-            for a in range(5):
-                for b in range(5):
-                    for c in range(5):
-                        agent_actions.append(f'<Utterance: [{a}, {b}, {c}]>')
-
+            return list(self.codec.agent_actions[NUM_PROPOSALS + 1:])
         else:
             raise ValueError()
 
-        return agent_actions
+    def read_observation(self, player_idx):
+        tensor = self.env.observation_tensor(player_idx)
+        num_players = self.game.num_players()
+        # current player, turn type and two end-of-game flags come first
+        turn_type = decode_one_hot(tensor[num_players:num_players + 2], 2)[0]
+        offset = num_players + 4
+        blocks = []
+        for size in [MAX_QUANTITY + 1, MAX_VALUE + 1, MAX_QUANTITY + 1, NUM_SYMBOLS]:
+            blocks.append(decode_one_hot(tensor[offset:offset + NUM_ITEMS * size], size))
+            offset += NUM_ITEMS * size
+        item_pool, util_vec, proposal, utterance = blocks
+        return {
+            'turn_type': TURN_TYPES[turn_type],
+            'item_pool': item_pool,
+            'util_vec': util_vec,
+            # empty before the first proposal or utterance
+            'most_recent_proposal': proposal if None not in proposal else None,
+            'most_recent_utterance': utterance if None not in utterance else None
+        }
 
-    def openspiel_observation_to_dict(self, current_player_idx, openspiel_obs):
+    def openspiel_observation_to_dict(self, current_player_idx):
         opponent_idx = 1 if current_player_idx == 0 else 0
-        turn_type = self.get_turn_type()
-
-        agent_util_vec_match = re.search(r'Agent 0 util vec: (\d+ \d+ \d+)', openspiel_obs) if current_player_idx == 0 else re.search(
-            r'Agent 1 util vec: (\d+ \d+ \d+)', openspiel_obs)
-        agent_util_vec = agent_util_vec_match.group(1)
-        agent_util_vec = agent_util_vec.split(' ')
-        agent_util_vec = [int(v) for v in agent_util_vec]
-
-        item_pool_match = re.search(r'Item pool: (\d+ \d+ \d+)', openspiel_obs)
-        item_pool = item_pool_match.group(1)
-        item_pool = item_pool.split(' ')
-        item_pool = [int(v) for v in item_pool]
-
-        most_recent_proposal_match = re.search(
-            r'Most recent proposal: (.+)', self.env.observation_string())
-        most_recent_utterance_match = re.search(
-            r'Most recent utterance: (.+)', self.env.observation_string())
+        observation = self.observe(current_player_idx)
 
         res = {
-            'opponent_moves': self.quick_action_memory_for_llm.get(opponent_idx, []),
-            'self_moves': self.quick_action_memory_for_llm.get(current_player_idx, []),
-            'turn_type': turn_type,
-            'self_value_vector': agent_util_vec,
-            'item_pool': item_pool,
-            'most_recent_proposal': most_recent_proposal_match.group(1)[1:-1].replace(',', '').split(' ') if most_recent_proposal_match is not None else None,
-            'most_recent_utterance': most_recent_utterance_match.group(1)[1:-1].replace(',', '').split(' ') if most_recent_utterance_match is not None else None
+            'opponent_moves': self.get_moves(opponent_idx),
+            'self_moves': self.get_moves(current_player_idx),
+            'turn_type': observation['turn_type'],
+            'self_value_vector': observation['util_vec'],
+            'item_pool': observation['item_pool'],
+            'most_recent_proposal': observation['most_recent_proposal'],
+            'most_recent_utterance': observation['most_recent_utterance']
         }
         return res
         pass
 
     def get_turn_type(self):
-        turn_type_match = re.search(r'Turn Type: (\w+)', str(self.env))
-        turn_type = turn_type_match.group(1)
-        return turn_type
+        return self.observe(self.env.current_player())['turn_type']
 
     def encode_integer(self, container, num_digit_values):
         encoded_value = 0
@@ -79,13 +91,23 @@ class Negotiation(OpenSpielGame):
         return encoded_value
 
     def agent_action_to_openspiel(self, action):
+        game_action = self.codec.to_openspiel(action)
+        if game_action is not None:
+            return game_action
+        # answers are often the bare quantities, e.g. [1, 2, 3], of this turn's type
+        move = ActionCodec.normalise(action) if isinstance(action, str) else ''
+        game_action = self.codec.action_ids.get(f'{self.get_turn_type().lower()}:{move}')
+        if game_action is None:
+            return self.parse_agent_action(action)
+        return game_action
+
+    def parse_agent_action(self, action):
         try:
             numbers_match = re.search(r'\[(\d+), (\d+), (\d+)\]', action)
             print(f"debug : numbers_match:{numbers_match},action:{action}")
             if self.get_turn_type() == 'Proposal':
                 if action.lower().__contains__('agree'):
-                    player_idx = self.env.current_player()
-                    return self.env.legal_actions(player_idx)[-1]
+                    return self.step_legal_actions[-1]
                 else:
 
                     first_number = int(numbers_match.group(1))
@@ -103,7 +125,7 @@ class Negotiation(OpenSpielGame):
                 third_number = int(numbers_match.group(3))
                 action = [min(4, first_number), min(
                     4, second_number), min(4, third_number)]
-                return int(pow(6, 3)) + 1 + self.encode_integer(action, 5)
+                return NUM_PROPOSALS + 1 + self.encode_integer(action, 5)
         except Exception as e:
             self.logger.error(e)
             self.logger.info("Unsuccessful interpreting LLM move")
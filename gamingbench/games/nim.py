@@ -2,33 +2,36 @@ import numpy as np
 from typing import List
 from gamingbench.utils.history_tracker import GameMatch, Step
 from gamingbench.utils import utils
-from gamingbench.games.openspiel_adapter import OpenSpielGame
+from gamingbench.games.openspiel_adapter import OpenSpielGame, decode_one_hot
 import re
 
 
 class Nim(OpenSpielGame):
     def __init__(self) -> None:
         super().__init__("nim")
+        self.pile_sizes = [int(p) for p in self.game.get_parameters()['pile_sizes'].split(';')]
         pass
 
-    def openspiel_action_to_agent(self, action):
-        actions = [f'<{a[:-1]}>' for a in action] # a[:-1] for pile:4, take:2; -> pile:4, take:2
-        return actions
-        pass
+    def format_action(self, action_string):
+        return f'<{action_string[:-1]}>' # a[:-1] for pile:4, take:2; -> pile:4, take:2
+
+    def read_observation(self, player_idx):
+        # the tensor ends with a one-hot block per pile, as wide as the largest pile
+        size = max(self.pile_sizes) + 1
+        tensor = self.env.observation_tensor(player_idx)
+        return {'piles': decode_one_hot(tensor[-len(self.pile_sizes) * size:], size)}
 
-    def openspiel_observation_to_dict(self, current_player_idx, openspiel_obs):
+    def openspiel_observation_to_dict(self, current_player_idx):
         opponent_idx = 1 if current_player_idx == 0 else 0
-        numbers = openspiel_obs.split(' ')
-        numbers = numbers[1:]
         res = {
-            'opponent_moves': self.quick_action_memory_for_llm.get(opponent_idx, []),
-            'self_moves': self.quick_action_memory_for_llm.get(current_player_idx, []),
-            'piles': numbers
+            'opponent_moves': self.get_moves(opponent_idx),
+            'self_moves': self.get_moves(current_player_idx),
+            'piles': self.observe(current_player_idx)['piles']
         }
         return res
         pass
 
-    def agent_action_to_openspiel(self, action):
+    def parse_agent_action(self, action):
         try:
             pattern = r'\d+'
             # Use re.findall to extract all numbers in the string
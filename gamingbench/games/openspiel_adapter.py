@@ -3,7 +3,7 @@ import pyspiel
 import open_spiel
 
 from typing import List
-from gamingbench.utils.history_tracker import GameMatch, Step
+from gamingbench.utils.history_tracker import GameMatch, MoveLog, Step
 from gamingbench.utils import utils
 
 from open_spiel.python import games  # import prisoners_dilemma
@@ -11,6 +11,51 @@ from open_spiel.python import games  # import prisoners_dilemma
 import copy
 
 
+def decode_one_hot(values, size):
+    '''
+    Hot index of each consecutive one-hot block of `size` entries in an
+    OpenSpiel tensor, None for a block without one.
+    '''
+    # plain lists: numpy costs more than it saves on tensors this small
+    hot = []
+    for start in range(0, len(values), size):
+        block = values[start:start + size]
+        hot.append(block.index(1.0) if 1.0 in block else None)
+    return hot
+
+
+class ActionCodec:
+    '''
+    Both directions of an adapter's action conversion, computed once per
+    game: a dense table from OpenSpiel action id to agent move and a dict
+    from normalised agent move back to the action id.
+    '''
+
+    def __init__(self, agent_actions, aliases=None) -> None:
+        # None for ids that have no agent move
+        self.agent_actions = tuple(agent_actions)
+        self.action_ids = {}
+        for action_id, agent_action in enumerate(self.agent_actions):
+            if agent_action is not None:
+                self.action_ids.setdefault(self.normalise(agent_action), action_id)
+        for alias, action_id in (aliases or {}).items():
+            self.action_ids.setdefault(self.normalise(alias), action_id)
+
+    @staticmethod
+    def normalise(move):
+        # '<C1R2>', 'C1R2' and '< c1r2 >' are the same move
+        return ''.join(move.split()).strip('<>').lower()
+
+    def to_agent(self, action_ids):
+        table = self.agent_actions
+        return [table[a] for a in action_ids]
+
+    def to_openspiel(self, move):
+        if not isinstance(move, str):
+            return None
+        return self.action_ids.get(self.normalise(move))
+
+
 class OpenSpielGame:
     def __init__(self, game_name) -> None:
         self.game_name = game_name
@@ -19,6 +64,13 @@ class OpenSpielGame:
         self.logger = utils.LLMBenchLogger(None)
         self.status = "Normal"
         self.quick_action_memory_for_llm = {}
+        # replaced by a per-match generator before every match
+        self.rng = np.random.default_rng()
+        self._codec = None
+        # legal actions of the player to move, for agent_action_to_openspiel
+        self.step_legal_actions = []
+        self._observed_move = None
+        self._observations = {}
         pass
 
     def reset(self):
@@ -27,6 +79,31 @@ class OpenSpielGame:
         self.logger = utils.LLMBenchLogger(None)
         self.status = "Normal"
         self.quick_action_memory_for_llm = {}
+        self._codec = None
+        self._observed_move = None
+        self._observations = {}
+
+    @property
+    def codec(self):
+        if self._codec is None:
+            self._codec = ActionCodec(self.agent_action_table(), self.agent_action_aliases())
+        return self._codec
+
+    def clone(self):
+        '''
+        Fresh match state that shares the already loaded (immutable)
+        OpenSpiel game instead of loading it again.
+        '''
+        # built before copying, so that every clone shares it
+        self.codec
+        game = copy.copy(self)
+        game.env = self.game.new_initial_state()
+        game.status = "Normal"
+        game.quick_action_memory_for_llm = {}
+        game.rng = np.random.default_rng()
+        game._observed_move = None
+        game._observations = {}
+        return game
 
     def print_game_info(self):
         self.logger.info(self.env.agents)
@@ -34,6 +111,28 @@ class OpenSpielGame:
         self.logger.info(self.env.action_spaces)
 
     def play(self, agent_list, model_list, tracker):
+        steps = self._play_iter(agent_list, model_list, tracker)
+        try:
+            agent, observations = next(steps)
+            while True:
+                agent, observations = steps.send(agent.step(observations))
+        except StopIteration:
+            pass
+
+    async def aplay(self, agent_list, model_list, tracker):
+        steps = self._play_iter(agent_list, model_list, tracker)
+        try:
+            agent, observations = next(steps)
+            while True:
+                agent, observations = steps.send(await agent.astep(observations))
+        except StopIteration:
+            pass
+
+    def _play_iter(self, agent_list, model_list, tracker):
+        '''
+        The game loop shared by play and aplay. It yields (agent, observations)
+        whenever an agent has to move and expects (action, query_list) back.
+        '''
         self.status = "Normal"
         _match = GameMatch()
         _match.start_timer()  # Start timing the match
@@ -46,7 +145,7 @@ class OpenSpielGame:
                 num_actions = len(outcomes)
                 print("Chance node, got " + str(num_actions) + " outcomes")
                 action_list, prob_list = zip(*outcomes)
-                action = np.random.choice(action_list, p=prob_list)
+                action = self.rng.choice(action_list, p=prob_list)
                 print("Sampled outcome: ",
                       self.env.action_to_string(self.env.current_player(), action))
                 self.env.apply_action(action)
@@ -56,30 +155,24 @@ class OpenSpielGame:
                 chosen_actions = []
                 abnormal = False
                 for player_idx in range(self.env.num_players()):
-                    observation_dict = self.openspiel_observation_to_dict(
-                        player_idx, str(self.env))
+                    observation_dict = self.openspiel_observation_to_dict(player_idx)
                     _step = Step(agent_list[player_idx].agent_name)
                     _step.set_model_name(model_list[player_idx].nick_name)
                     _step.set_observation(observation_dict)
                     legal_actions = self.env.legal_actions(player_idx)
+                    self.step_legal_actions = legal_actions
                     observation_dict['openspiel_legal_actions'] = legal_actions
-                    valid_action = [self.env.action_to_string(
-                        a) for a in legal_actions]
-                    valid_action = self.openspiel_action_to_agent(valid_action)
+                    valid_action = self.openspiel_action_to_agent(legal_actions)
                     observation_dict['legal_moves'] = valid_action
                     observation_dict['env_name'] = self.game_name
                     self.logger.info(
                         f"openspiel_game_legal_action:{legal_actions}")
                     self.logger.info(f"validMove:{valid_action}")
-                    action, query_list = agent_list[player_idx].step(
-                        observation_dict)
+                    action, query_list = yield agent_list[player_idx], observation_dict
                     self.logger.info(
                         f"player: {player_idx} agent:{agent_list[player_idx].agent_name}, action: {action}")
-                    act = self.quick_action_memory_for_llm.get(
-                        player_idx, [])
-
-                    act.append(action)
-                    self.quick_action_memory_for_llm[player_idx] = act
+                    self.quick_action_memory_for_llm.setdefault(
+                        player_idx, MoveLog()).append(action)
 
                     for q in query_list:
                         _step.add_query(q)
@@ -119,38 +212,27 @@ class OpenSpielGame:
                 _step = Step(agent_list[player_idx].agent_name)
                 _step.set_model_name(model_list[player_idx].nick_name)
 
-                try:
-                    observations = self.env.observation_string()
-                except Exception as e:
-                    observations = str(self.env)
-
-                observation_dict = self.openspiel_observation_to_dict(
-                    self.env.current_player(), observations)
+                observation_dict = self.openspiel_observation_to_dict(player_idx)
                 observation_dict['state'] = self.env
 
                 legal_actions = self.env.legal_actions(player_idx)
+                self.step_legal_actions = legal_actions
                 observation_dict['openspiel_legal_actions'] = legal_actions
-                valid_action = [self.env.action_to_string(
-                    a) for a in legal_actions]
-                valid_action = self.openspiel_action_to_agent(valid_action)
+                valid_action = self.openspiel_action_to_agent(legal_actions)
 
                 observation_dict['legal_moves'] = valid_action
                 observation_dict['env_name'] = self.game_name
                 if len(legal_actions) != 1:
-                    action, query_list = agent_list[player_idx].step(
-                        observation_dict)
+                    action, query_list = yield agent_list[player_idx], observation_dict
                 else:
                     action, query_list = valid_action[0], []
 
-                act = self.quick_action_memory_for_llm.get(
-                    player_idx, [])
-
-                act.append(action)
-                self.quick_action_memory_for_llm[player_idx] = act
+                self.quick_action_memory_for_llm.setdefault(
+                    player_idx, MoveLog()).append(action)
 
                 observation_dict.pop('state')
-                _step.set_observation(copy.deepcopy(observation_dict))
-                # _step.set_observation(observation_dict)
+                # move histories are immutable views, no copy is needed
+                _step.set_observation(observation_dict)
                 self.logger.info(
                     f"openspiel_game_legal_action:{legal_actions}")
 
@@ -208,14 +290,58 @@ class OpenSpielGame:
         else:
             self.logger.info("There are no winner in this game.")
 
-    def openspiel_observation_to_dict(self, current_player_idx, openspiel_obs):
+    def get_moves(self, player_idx):
+        '''Moves of `player_idx` so far, as a view that later moves leave unchanged.'''
+        return self.quick_action_memory_for_llm.setdefault(player_idx, MoveLog()).view()
+
+    def observe(self, player_idx):
+        '''
+        What `player_idx` observes in the current state, read once per step
+        and shared by every caller of that step.
+        '''
+        move_number = self.env.move_number()
+        if move_number != self._observed_move:
+            self._observed_move = move_number
+            self._observations = {}
+        if player_idx not in self._observations:
+            self._observations[player_idx] = self.read_observation(player_idx)
+        return self._observations[player_idx]
+
+    def read_observation(self, player_idx):
+        '''Observation dict of `player_idx`, decoded from the OpenSpiel tensors.'''
+        return {}
+
+    def openspiel_observation_to_dict(self, current_player_idx):
+        return {}
+
+    def format_action(self, action_string):
+        '''The agent move of an OpenSpiel action string.'''
+        return action_string
+
+    def agent_action_table(self):
+        '''Agent move of every OpenSpiel action id, indexed by the id.'''
+        state = self.game.new_initial_state()
+        return [self.format_action(state.action_to_string(0, a))
+                for a in range(self.game.num_distinct_actions())]
+
+    def agent_action_aliases(self):
+        '''Other spellings of agent moves, mapped to their action ids.'''
         return {}
 
-    def openspiel_action_to_agent(self, action):
-        return action
+    def openspiel_action_to_agent(self, action_ids):
+        return self.codec.to_agent(action_ids)
 
     def agent_action_to_openspiel(self, action):
-        return action
+        game_action = self.codec.to_openspiel(action)
+        if game_action is None:
+            # free-form answers that are not one of the listed moves
+            game_action = self.parse_agent_action(action)
+        return game_action
+
+    def parse_agent_action(self, action):
+        self.logger.info("Unsuccessful interpreting LLM move")
+        self.logger.info(action)
+        return None
 
     def is_match_normal(self) -> bool:
         return self.status == 'Normal'
@@ -2,8 +2,7 @@
 from typing import List
 from gamingbench.utils.history_tracker import GameMatch, Step
 from gamingbench.utils import utils
-from gamingbench.games.openspiel_adapter import OpenSpielGame
-import re
+from gamingbench.games.openspiel_adapter import OpenSpielGame, decode_one_hot
 import pyspiel
 
 
@@ -13,21 +12,35 @@ class Pig(OpenSpielGame):
         self.game = pyspiel.load_game(
             "pig", {'winscore': 20})
         self.env = self.game.new_initial_state()
+        self.win_score = self.game.get_parameters()['winscore']
         pass
 
-    def openspiel_action_to_agent(self, action):
-        return [f'<{a}>' for a in action]
-        pass
+    def format_action(self, action_string):
+        return f'<{action_string}>'
 
-    def openspiel_observation_to_dict(self, current_player_idx, openspiel_obs):
-        opponent_idx = 1 if current_player_idx == 0 else 0
+    def read_observation(self, player_idx):
+        # one-hot rows of the turn total and the scores, capped at the win score
+        turn_total, *scores = decode_one_hot(self.env.observation_tensor(player_idx), self.win_score + 1)
+        if turn_total == self.win_score:
+            # a player who keeps rolling can pass the cap
+            turn_total = self.replay_turn_total()
+        return {'scores': scores, 'turn_total': turn_total}
 
-        pattern = r'\b\d+\b'
+    def replay_turn_total(self):
+        # chance outcome i is a roll of i + 1: a one loses the turn total, as does stopping
+        turn_total = 0
+        for player_action in self.env.full_history():
+            if player_action.player == pyspiel.PlayerId.CHANCE:
+                turn_total = 0 if player_action.action == 0 else turn_total + player_action.action + 1
+            elif player_action.action == 1:
+                turn_total = 0
+        return turn_total
 
-        # Use re.findall to extract all numbers in the string
-        numbers = re.findall(pattern, openspiel_obs)
-        # Extract the first three numbers
-        num1, num2, num3 = map(int, numbers[:3])
+    def openspiel_observation_to_dict(self, current_player_idx):
+        opponent_idx = 1 if current_player_idx == 0 else 0
+        observation = self.observe(current_player_idx)
+        num1, num2 = observation['scores']
+        num3 = observation['turn_total']
 
         res = {
             # 'opponent_moves': self.quick_action_memory_for_llm.get(opponent_idx, []),
@@ -40,7 +53,7 @@ class Pig(OpenSpielGame):
         return res
         pass
 
-    def agent_action_to_openspiel(self, action):
+    def parse_agent_action(self, action):
         try:
             action = action.lower()
             stop_index = float("inf")
@@ -2,7 +2,6 @@ import numpy as np
 from typing import List
 from gamingbench.utils.history_tracker import GameMatch, Step
 from gamingbench.utils import utils
-import copy
 from gamingbench.games.openspiel_adapter import OpenSpielGame
 import re
 
@@ -13,19 +12,17 @@ class TicTacToe(OpenSpielGame):
         self.game_name = 'tictactoe'
         pass
 
-    def openspiel_action_to_agent(self, action):
+    def format_action(self, action_string):
+        # x(row,col) -> <C{col+1}R{row+1}>
+        return f'<C{int(action_string[4])+1}R{int(action_string[2])+1}>'
 
-        actions = [f'<C{int(a[4])+1}R{int(a[2])+1}>' for a in action]
-        return actions
-        pass
-
-    def openspiel_observation_to_dict(self, current_player_idx, openspiel_obs):
+    def openspiel_observation_to_dict(self, current_player_idx):
         opponent_idx = 1 if current_player_idx == 0 else 0
         res = {
             # 'opponent_moves': self.quick_action_memory_for_llm.get(opponent_idx, []),
             # 'self_moves': self.quick_action_memory_for_llm.get(current_player_idx, []),
-            'opponent_moves': copy.deepcopy(self.quick_action_memory_for_llm.get(opponent_idx, [])),
-            'self_moves': copy.deepcopy(self.quick_action_memory_for_llm.get(current_player_idx, [])),
+            'opponent_moves': self.get_moves(opponent_idx),
+            'self_moves': self.get_moves(current_player_idx),
         }
         return res
         pass
@@ -36,7 +33,7 @@ class TicTacToe(OpenSpielGame):
         self.game_name = 'tictactoe'
         pass
 
-    def agent_action_to_openspiel(self, action):
+    def parse_agent_action(self, action):
         try:
             numbers_match = re.search(r'C(\d+)R(\d+)', action)
 
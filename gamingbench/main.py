@@ -1,22 +1,44 @@
-import copy
+import collections
+import itertools
+import math
 import os.path
 import argparse
+import datetime
 import pathlib
-import threading
+import signal
+import socket
+import sys
+import time
 from gamingbench.utils import utils
 from gamingbench.environments.base_env import BaseGameEnv
+from gamingbench.utils.scheduler import MatchScheduler
+from gamingbench.utils.agent_pool import get_agent_pool
+from gamingbench.utils.run_plan import get_run_plan
+from gamingbench.models.base_model import default_max_concurrency
+from gamingbench.utils.stopping import build_stopping_rule
+from gamingbench.utils.ratings import EloRatings
+from gamingbench.utils.job_queue import JobQueue, run_queue_worker
+from gamingbench.utils import shards
+from gamingbench.utils import failures
+from gamingbench.utils.history_tracker import GameMatch
+from gamingbench.utils.sweep import load_sweep
+from gamingbench.utils.estimator import QueryStats, estimate_run
 import json
 
 games = ['tictactoe', 'connect4', 'texasholdem', 'neuron_poker', 'backgammon', 'breakthrough',
          'first_sealed_auction', 'gin_rummy', 'liars_dice', 'negotiation', 'nim', 'pig', 'kuhn_poker',
          'prisoners_dilemma']
 
+# used when --exp-root is not given (and a sweep spec does not set its own)
+DEFAULT_EXP_ROOT = '../experiments'
 
-def get_args():
+
+def get_parser():
     parser = argparse.ArgumentParser()
     parser.add_argument('--num-matches', type=int,
                         default=100, help='The number gaming matches')
-    parser.add_argument('--exp-root', type=str, default='../experiments')
+    parser.add_argument('--exp-root', type=str, default=None,
+                        help=f'Output directory (default {DEFAULT_EXP_ROOT}, or the exp_root of a --sweep spec)')
     parser.add_argument('--seed', type=int, default=0)
     # gaming parameters
     parser.add_argument('--game-names', type=str, nargs='+',
@@ -41,181 +63,598 @@ def get_args():
     parser.add_argument('--exchange-first-player',
                         default=False, action='store_true')
     parser.add_argument('--num-workers', default=1, type=int)
+    parser.add_argument('--executor', default='thread', choices=['thread', 'process', 'async'],
+                        help='Run matches in threads (LLM-bound), processes (CPU-bound, e.g. MCTS) '
+                             'or as coroutines in one event loop (many concurrent LLM matches)')
+    parser.add_argument('--model-concurrency', default=None, type=int,
+                        help='Maximum in-flight queries per model for the async executor, '
+                             'unless the model config sets max_concurrency')
+    parser.add_argument('--max-tasks-per-child', default=100, type=int,
+                        help='Matches a worker process runs before it is replaced (process executor only)')
     parser.add_argument('--threshold-matches', default=50, type=int)
-    args = parser.parse_args()
+    parser.add_argument('--max-match-attempts', default=3, type=int,
+                        help='Times a match that fails with an error is played before it is given up')
+    parser.add_argument('--collapse-deterministic', default=False, action='store_true',
+                        help='Play matchups without chance nodes and agent randomness once per '
+                             'seat order, recorded with the number of matches as weight')
+    parser.add_argument('--paired', default=False, action='store_true',
+                        help='Common random numbers: the seat-swapped matches of a pair (with '
+                             '--exchange-first-player) and runs with the same seed replay '
+                             'the same chance outcomes')
+    # sequential early stopping
+    parser.add_argument('--stop-rule', default='none', choices=['none', 'sprt', 'ci'],
+                        help='Stop launching matches of a game once its outcome is clear')
+    parser.add_argument('--min-matches', default=10, type=int,
+                        help='Normal matches required before the stopping rule is checked')
+    parser.add_argument('--sprt-p0', default=0.5, type=float)
+    parser.add_argument('--sprt-p1', default=0.7, type=float)
+    parser.add_argument('--sprt-alpha', default=0.05, type=float)
+    parser.add_argument('--sprt-beta', default=0.05, type=float)
+    parser.add_argument('--ci-width', default=0.2, type=float,
+                        help='Target width of the win/draw/loss rate confidence intervals')
+    parser.add_argument('--resume', default=False, action='store_true',
+                        help='Skip matches that already have a normal record in the result file')
+    parser.add_argument('--resume-from', type=str, default=None,
+                        help='Run manifest of an interrupted run; repeats its command line with --resume')
+    parser.add_argument('--dry-run', default=False, action='store_true',
+                        help='Predict queries, tokens, cost and wall time of the run without playing it')
+    parser.add_argument('--grace-period', default=60, type=float,
+                        help='Seconds running matches get to finish after SIGINT/SIGTERM')
+    # round-robin tournament
+    parser.add_argument('--entrants', type=str, nargs='+', default=[],
+                        help='Tournament entrants as <agent config>:<model config>; '
+                             'replaces --agent-configs/--model-configs')
+    parser.add_argument('--elo-k', default=16, type=float)
+    parser.add_argument('--sweep', type=str, default=None,
+                        help='YAML sweep spec; every cell of its matrix runs in one shared pool')
+    # multi-node runs through a shared job queue
+    parser.add_argument('--job-queue', type=str, default=None,
+                        help='SQLite file shared by a coordinator and workers on any node')
+    parser.add_argument('--role', default='coordinator', choices=['coordinator', 'worker'],
+                        help='The coordinator queues matches and writes results, '
+                             'workers claim and play them (with --job-queue only)')
+    parser.add_argument('--lease-seconds', default=300, type=float,
+                        help='A claimed match is handed to another worker if its worker '
+                             'sends no heartbeat for this long')
+    parser.add_argument('--worker-idle-timeout', default=600, type=float,
+                        help='Seconds a worker waits for new matches before exiting')
+    return parser
+
+
+def get_args(argv=None):
+    parser = get_parser()
+    argv = sys.argv[1:] if argv is None else argv
+    args = parser.parse_args(argv)
+    if args.resume_from:
+        with open(args.resume_from) as file:
+            argv = json.load(file)['argv']
+        args = parser.parse_args(argv)
+        args.resume = True
+    # the manifest keeps the original command line, also across resumes
+    args.argv = argv
+    set_default_exp_root(args)
+    if args.entrants:
+        # every pairing plays both seat orders and reuses earlier results
+        args.exchange_first_player = True
+        args.resume = True
 
     return args
 
 
-def run_game(game_name):
-    log_root = os.path.join(args.exp_root, game_name)
+def set_default_exp_root(args):
+    # a sweep spec's exp_root applies only when --exp-root was not given
+    if args.exp_root is None and not args.sweep:
+        args.exp_root = DEFAULT_EXP_ROOT
+
+
+def options_to_argv(args):
+    '''
+    Command line that parses to the options of `args`, for experiments that
+    were not started from one. API keys are left out of the manifest.
+    '''
+    argv = []
+    for action in get_parser()._actions:
+        if action.dest in ['help', 'api_keys', 'resume_from']:
+            continue
+        value = getattr(args, action.dest, action.default)
+        if value == action.default:
+            continue
+        option = action.option_strings[0]
+        if isinstance(action, argparse._StoreTrueAction):
+            argv.append(option)
+        elif action.nargs == '+':
+            argv += [option, *map(str, value)]
+        else:
+            argv += [option, str(value)]
+    return argv
+
+
+def get_entrant_name(agent_config_path, model_config_path):
+    agent_name = agent_config_path.split('/')[-1].split('.')[0]
+    model_name = model_config_path.split('/')[-1].split('.')[0]
+    return f'{agent_name}_{model_name}'
+
+
+def get_result_path(game_name, agent_configs, model_configs, run_args):
+    entrants = [get_entrant_name(a, m)
+                for a, m in zip(agent_configs, model_configs)]
+    return os.path.join(run_args.exp_root, game_name, f'{entrants[0]}_{entrants[1]}.jsonl')
+
+
+def run_game(game_name, scheduler, agent_configs, model_configs, run_args, key_prefix=''):
+    # sweep cells pass their own options, everything else runs with the command line ones
+    log_root = os.path.join(run_args.exp_root, game_name)
     pathlib.Path(log_root).mkdir(parents=True, exist_ok=True)
-    agent_names = [a.split('/')[-1].split('.')[0] for a in args.agent_configs]
-    model_names = [m.split('/')[-1].split('.')[0] for m in args.model_configs]
+    entrants = [get_entrant_name(a, m)
+                for a, m in zip(agent_configs, model_configs)]
 
-    run_name = f'{agent_names[0]}_{model_names[0]}_{agent_names[1]}_{model_names[1]}'
+    run_name = f'{entrants[0]}_{entrants[1]}'
+    run_key = f'{key_prefix}{game_name}/{run_name}'
 
     log_path = os.path.join(log_root, run_name + '.log')
     logger = utils.LLMBenchLogger(log_path)
-    result_path = os.path.join(log_root, run_name + '.jsonl')
+    result_path = get_result_path(game_name, agent_configs, model_configs, run_args)
 
-    if not os.path.exists(result_path):
+    if not os.path.exists(result_path) and not run_args.dry_run:
         file = open(result_path, 'w')
         file.close()
-
-    # initialize env and game
-    game_env = BaseGameEnv()
-    game = utils.load_game(os.path.join(
-        args.game_config_root, f'{game_name}.yaml'))
-    game_env.save_game_config(utils.load_config(
-        os.path.join(args.game_config_root, f'{game_name}.yaml')))
-
-    # initialize agents
-    agents = [utils.load_agent(config_path, game=game.game)
-              for config_path in args.agent_configs]
-    models = [utils.load_model(config_path)
-              for config_path in args.model_configs]
-
-    for a, m in zip(agents, models):
-        a.set_model(m)
-
-    # exchange first player to mitigate first-player advantage
-    reversed_agent_configs = copy.deepcopy(args.agent_configs)
-    reversed_agent_configs.reverse()
-    reversed_agents = [utils.load_agent(
-        config_path, game=game.game) for config_path in reversed_agent_configs]
-    reversed_model_configs = copy.deepcopy(args.model_configs)
-    reversed_model_configs.reverse()
-    reversed_models = [utils.load_model(config_path)
-                       for config_path in reversed_model_configs]
-
-    for a, m in zip(reversed_agents, reversed_models):
-        a.set_model(m)
-
-    for config_path in args.model_configs:
-        game_env.append_models_config(utils.load_config(config_path))
-
-    game_env.set_game(game)
-
-    lock = threading.Lock()
-
-    if args.num_workers == 1:
-        results = []
-        for match_idx in range(args.num_matches):
-            match_arg = {
-                'match_idx': match_idx,
-                'game_name': game_name,
-                'agents': agents,
-                'reversed_agents': reversed_agents,
-                'models': models,
-                'reversed_models': reversed_models,
-                'result_path': result_path,
-                'args': args,
-                'lock': lock
-            }
-            results.append(run_match(match_arg))
-    else:
-        match_arg_list = []
-        for match_idx in range(args.num_matches):
-            match_arg_list.append({
-                'match_idx': match_idx,
-                'game_name': game_name,
-                'models': models,
-                'reversed_models': reversed_models,
-                'agents': agents,
-                'reversed_agents': reversed_agents,
-                'result_path': result_path,
-                'args': args,
-                'lock': lock
-            })
-        results = utils.parallel_func(run_match, match_arg_list,
-                                      num_workers=args.num_workers)
-        remaining_matches_param = pick_out_invalid_matches(results)
-
-        while len(results) < args.threshold_matches and len(remaining_matches_param) != 0:
-            added_results = utils.parallel_func(run_match, remaining_matches_param,
-                                                num_workers=min(args.num_workers, len(remaining_matches_param)))
-            results = results + added_results
-            remaining_matches_param = pick_out_invalid_matches(added_results)
-        # save to jsonl
-        results = [r[0] for r in results]
-    # utils.save_jsonl(results, result_path)
-
-
-def pick_out_invalid_matches(results):
-    invalid_matches_param = []
-    for history, parameters in results:
-        if history["matches"][0]["status"] != "Normal":
-            invalid_matches_param.append(parameters)
-    return invalid_matches_param
+    if not run_args.dry_run:
+        # shards left behind by an interrupted run
+        merge_results(result_path, run_key, logger)
+    dropped = utils.repair_jsonl_tail(result_path)
+    if dropped:
+        logger.info(
+            f'[{run_key}] dropped a partially written record ({dropped} bytes) from {result_path}')
+
+    match_index = utils.load_match_index(result_path) if run_args.resume else {}
+
+    # parse configs and load the game once for all matches
+    run_plan = get_run_plan(game_name, os.path.join(run_args.game_config_root, f'{game_name}.yaml'),
+                            agent_configs, model_configs)
+    # every worker gets its own agents, reused across its matches
+    agent_pool = get_agent_pool(run_plan)
+    scheduler.duration_model.load(run_args.exp_root)
+
+    match_indices = list(range(run_args.num_matches))
+    weights = {}
+    if run_args.collapse_deterministic and agent_pool.is_deterministic():
+        # every match of a seat order plays the same, the first one stands for all
+        seat_orders = [is_reversed_match(i, run_args) for i in match_indices]
+        match_indices = [seat_orders.index(r) for r in sorted(set(seat_orders))]
+        weights = {i: seat_orders.count(seat_orders[i]) for i in match_indices}
+        logger.info(f'[{run_key}] deterministic matchup: {len(match_indices)} of '
+                    f'{run_args.num_matches} matches played, weighted by seat order')
+
+    match_arg_list = []
+    for match_idx in match_indices:
+        match_key = utils.get_match_key(
+            game_name, match_idx, is_reversed_match(match_idx, run_args))
+        if match_index.get(match_key) == 'Normal':
+            continue
+        match_arg_list.append({
+            'run_key': run_key,
+            'match_idx': match_idx,
+            'match_key': match_key,
+            'game_name': game_name,
+            'entrants': entrants,
+            'run_plan': run_plan,
+            'agent_pool': agent_pool,
+            'result_path': result_path,
+            'weight': weights.get(match_idx, 1),
+            'args': run_args
+        })
+    if run_args.exchange_first_player:
+        # alternate seat orders so that a run stopped early stays balanced
+        half = math.ceil(run_args.num_matches / 2)
+        match_arg_list.sort(key=lambda p: (p['match_idx'] % half, p['match_idx']))
+    if run_args.resume:
+        logger.info(f'[{run_key}] resuming: {len(match_indices) - len(match_arg_list)} '
+                    f'matches already completed, {len(match_arg_list)} scheduled')
+    scheduler.add_run(run_key, match_arg_list,
+                      threshold_matches=run_args.threshold_matches,
+                      max_match_attempts=run_args.max_match_attempts,
+                      stopping_rule=build_stopping_rule(run_args),
+                      expected_duration=scheduler.duration_model.expected(run_plan))
+    return run_key, result_path
+
+
+def run_tournament(scheduler, args):
+    '''
+    Round robin over --entrants: every pairing plays both seat orders in the
+    shared pool. Pairings already completed by earlier runs are reused and
+    seed the ratings, which are then updated as matches finish.
+    '''
+    entrants = [e.split(':') for e in args.entrants]
+    names = [get_entrant_name(a, m) for a, m in entrants]
+    assert len(set(names)) == len(names), 'entrants must be distinct'
+
+    ratings = {}
+    result_paths = {}
+    for game_name in args.game_names:
+        ratings[game_name] = EloRatings(k=args.elo_k)
+        for name in names:
+            ratings[game_name].add_entrant(name)
+        for (agent_a, model_a), (agent_b, model_b) in itertools.combinations(entrants, 2):
+            run_key, result_path = run_game(game_name, scheduler,
+                                            [agent_a, agent_b], [model_a, model_b], args)
+            result_paths[run_key] = result_path
+            if args.dry_run:
+                # a dry run creates no result files and rates nothing
+                continue
+            rated_keys = set()
+            for record in utils.load_jsonl(result_path):
+                if record.get('entrant_score') is None or record['match_key'] in rated_keys:
+                    continue
+                rated_keys.add(record['match_key'])
+                for _ in range(record.get('weight', 1)):
+                    ratings[game_name].update(
+                        get_entrant_name(agent_a, model_a), get_entrant_name(agent_b, model_b),
+                        record['entrant_score'])
+
+    def rate(result):
+        res, params = result
+        if res['entrant_score'] is not None:
+            game_ratings = ratings[params['game_name']]
+            for _ in range(res['weight']):
+                game_ratings.update(*params['entrants'], res['entrant_score'])
+            save_ratings(game_ratings, params['game_name'], args.exp_root)
+
+    if args.dry_run:
+        return result_paths
+    scheduler.result_handler = rate
+    for game_name, game_ratings in ratings.items():
+        save_ratings(game_ratings, game_name, args.exp_root)
+    return result_paths
+
+
+def run_sweep(scheduler, args):
+    '''
+    Register the games of every sweep cell not completed by an earlier
+    sweep. Returns the result paths by run key and the run keys of each cell.
+    '''
+    sweep_root, cells = load_sweep(args.sweep, args, DEFAULT_EXP_ROOT)
+    # the manifest and dry-run estimate go to the sweep root
+    args.exp_root = sweep_root
+    pathlib.Path(sweep_root).mkdir(parents=True, exist_ok=True)
+    logger = utils.LLMBenchLogger(os.path.join(sweep_root, 'sweep.log'))
+    result_paths = {}
+    cell_runs = []
+    for cell in cells:
+        if cell.is_complete():
+            logger.info(f'[{cell.name}] already complete in {cell.args.exp_root}, skipped')
+            continue
+        run_keys = []
+        for game_name in cell.args.game_names:
+            run_key, result_path = run_game(game_name, scheduler, cell.agent_configs, cell.model_configs,
+                                            run_args=cell.args, key_prefix=f'{cell.name}/')
+            result_paths[run_key] = result_path
+            run_keys.append(run_key)
+        cell_runs.append((cell, run_keys))
+    return result_paths, cell_runs
+
+
+def save_ratings(game_ratings, game_name, exp_root):
+    ratings_path = os.path.join(exp_root, game_name, 'tournament_ratings.json')
+    with open(ratings_path, 'w') as file:
+        json.dump(game_ratings.to_dict(), file, indent=2)
+
+
+def is_reversed_match(match_idx, args):
+    return args.exchange_first_player and match_idx >= (args.num_matches / 2)
+
+
+def get_pair_idx(match_idx, args):
+    # the reversed match of a pair is half a run after the original one
+    if not args.exchange_first_player:
+        return match_idx
+    return match_idx % math.ceil(args.num_matches / 2)
 
 
 def run_match(params):
+    game_env = BaseGameEnv()
+    try:
+        instances = prepare_match(game_env, params)
+        try:
+            game_env.play()
+        finally:
+            params['agent_pool'].release(instances, game_env.reversed_order)
+    except Exception as e:
+        # a failed match is recorded, it never takes the run down with it
+        return finish_match(game_env, params, error=e)
+    return finish_match(game_env, params)
+
+
+async def arun_match(params):
+    # every match runs in its own task, so experiments sharing a process keep their limits
+    default_max_concurrency.set(params['args'].model_concurrency)
+    game_env = BaseGameEnv()
+    try:
+        instances = prepare_match(game_env, params)
+        try:
+            await game_env.aplay()
+        finally:
+            params['agent_pool'].release(instances, game_env.reversed_order)
+    except Exception as e:
+        return finish_match(game_env, params, error=e)
+    return finish_match(game_env, params)
+
+
+def prepare_match(game_env, params):
     match_idx = params['match_idx']
-    game_name = params['game_name']
-    agents = params['agents']
-    reversed_agents = params['reversed_agents']
-    models = params['models']
-    reversed_models = params['reversed_models']
-    result_path = params['result_path']
+    agent_pool = params['agent_pool']
 
     args = params['args']
-    game_env = BaseGameEnv()
-    game = utils.load_game(os.path.join(
-        args.game_config_root, f'{game_name}.yaml'))
-    game_env.save_game_config(utils.load_config(
-        os.path.join(args.game_config_root, f'{game_name}.yaml')))
-
+    run_plan = params['run_plan']
+    reversed_order = is_reversed_match(match_idx, args)
+
+    game_env.reversed_order = reversed_order
+    game_env.save_game_config(run_plan.game_config)
+    game = run_plan.new_game()
+    # chance nodes and stochastic agents draw from streams owned by this match
+    pair_idx = get_pair_idx(match_idx, args) if args.paired else None
+    game.rng, agent_rngs = utils.get_match_rngs(
+        args.seed, params['game_name'], match_idx, reversed_order, pair_idx=pair_idx)
     game_env.set_game(game)
 
-    if args.exchange_first_player and match_idx >= (args.num_matches / 2):
-        # exchange first player
-        game_env.set_agents(reversed_agents)
-        game_env.set_models(reversed_models)
-        reversed_agent_configs = copy.deepcopy(args.agent_configs)
-        reversed_agent_configs.reverse()
-        for config_path in reversed_agent_configs:
-            game_env.append_agents_config(utils.load_config(config_path))
-
-        reversed_model_configs = copy.deepcopy(args.model_configs)
-        reversed_model_configs.reverse()
-        for config_path in reversed_model_configs:
-            game_env.append_models_config(utils.load_config(config_path))
-    else:
-        game_env.set_agents(agents)
-        game_env.set_models(models)
-
-        for config_path in args.agent_configs:
-            game_env.append_agents_config(utils.load_config(config_path))
+    # the pool and the plan both swap seats when the first player is exchanged
+    instances = agent_pool.acquire(reversed_order, agent_rngs)
+    agents, models = instances
+    game_env.set_agents(agents)
+    game_env.set_models(models)
+    agent_configs, model_configs = run_plan.get_configs(reversed_order)
+    for config in agent_configs:
+        game_env.append_agents_config(config)
+    for config in model_configs:
+        game_env.append_models_config(config)
+    return instances
+
+
+def finish_match(game_env, params, error=None):
+    if error is not None:
+        tracker = game_env.history_tracker
+        if not tracker.matches:
+            # the match ended before it reached the tracker
+            tracker.add_match(GameMatch())
+        tracker.matches[0].status = 'Error'
+    res = game_env.history_tracker.to_dict()
+    res['match_key'] = params['match_key']
+    res['match_idx'] = params['match_idx']
+    res['seat_order'] = 'reversed' if game_env.reversed_order else 'original'
+    res['weight'] = params.get('weight', 1)
+    if params['args'].paired:
+        res['pair_idx'] = get_pair_idx(params['match_idx'], params['args'])
+    # score of the first --agent-configs entrant: 1 win, 0.5 draw, 0 loss
+    res['entrant_score'] = None
+    if res['matches'][0]['status'] == 'Normal':
+        returns = game_env.game.env.returns()
+        seat = 1 if game_env.reversed_order else 0
+        if returns[seat] > returns[1 - seat]:
+            res['entrant_score'] = 1
+        elif returns[seat] < returns[1 - seat]:
+            res['entrant_score'] = 0
+        else:
+            res['entrant_score'] = 0.5
+    if error is not None:
+        res['error'] = failures.describe(error)
+        utils.LLMBenchLogger(None).info(
+            f"[{params['run_key']}] {params['match_key']} failed ({res['error']['kind']}-fatal): "
+            f"{res['error']['type']}: {res['error']['message']}")
+
+    # every worker appends to its own shard, merged into the result file after the run
+    shards.append_record(params['result_path'], res)
+    # the full history only lives on disk, the scheduler gets a compact summary
+    match = res['matches'][0]
+    summary = {
+        'match_key': res['match_key'],
+        'status': match['status'],
+        'winner': match['winner'],
+        'winner_score': match['winner_score'],
+        'loser_score': match['loser_score'],
+        'entrant_score': res['entrant_score'],
+        'weight': res['weight'],
+        'token_size': match['token_size'],
+        'duration_seconds': match['duration_seconds'],
+        'failure': res['error']['kind'] if error is not None else None,
+        'error': f"{res['error']['type']}: {res['error']['message']}" if error is not None else None
+    }
+    return (summary, params)
+
+
+def merge_results(result_path, run_key, logger):
+    stats = shards.merge_shards(result_path)
+    if stats['corrupt'] or stats['duplicates']:
+        logger.info(f'[{run_key}] merged {stats["shards"]} shards into {result_path}: '
+                    f'{stats["records"]} records, dropped {stats["corrupt"]} corrupt '
+                    f'and {stats["duplicates"]} duplicate ones')
+
+
+def merge_live_results(scheduler, result_path, run_key, logger):
+    # a merge removes the shards it read, a record appended meanwhile would be lost
+    if any(params['result_path'] == result_path for _, params in scheduler.abandoned_live):
+        logger.info(f'[{run_key}] abandoned matches may still write to {result_path}, '
+                    f'its shards are merged by the next run')
+        return
+    merge_results(result_path, run_key, logger)
+
+
+def set_api_keys(api_keys):
+    for k in api_keys:
+        if k.startswith('sk-'):
+            os.environ["OPENAI_API_KEY"] = k
+        elif k.startswith('esecret'):
+            os.environ["ANYSCALE_API_KEY"] = k
+        else:
+            os.environ["DEEPINFRA_API_KEY"] = k
+
+
+def start_experiment(args):
+    '''
+    Register every run of the experiment described by `args` in a new
+    scheduler. Returns the scheduler, the result paths by run key and the
+    run keys of each sweep cell.
+    '''
+    utils.set_seed(args.seed)
 
-        for config_path in args.model_configs:
-            game_env.append_models_config(utils.load_config(config_path))
+    job_queue = None
+    if args.job_queue is not None:
+        job_queue = JobQueue(args.job_queue, lease_seconds=args.lease_seconds)
+        # matches of an earlier coordinator are rescheduled by --resume
+        if not args.dry_run:
+            job_queue.reset()
+
+    # matches of all games share one worker pool
+    executor = 'queue' if job_queue is not None else args.executor
+    scheduler = MatchScheduler(arun_match if executor == 'async' else run_match,
+                               num_workers=args.num_workers,
+                               executor=executor,
+                               max_tasks_per_child=args.max_tasks_per_child if executor == 'process' else None,
+                               job_queue=job_queue,
+                               grace_period=args.grace_period)
+    cell_runs = []
+    if args.sweep:
+        result_paths, cell_runs = run_sweep(scheduler, args)
+    elif args.entrants:
+        result_paths = run_tournament(scheduler, args)
+    else:
+        result_paths = {}
+        for game_name in args.game_names:
+            run_key, result_path = run_game(game_name, scheduler,
+                                            args.agent_configs, args.model_configs, args)
+            result_paths[run_key] = result_path
+    return scheduler, result_paths, cell_runs
 
-    game_env.play()
-    res = game_env.history_tracker.to_dict()
-    with params['lock']:
-        with open(result_path, 'a') as file:
-            file.writelines(json.dumps(res) + '\n')
 
-    return (res, params)
+def finish_experiment(scheduler, args, result_paths, cell_runs):
+    '''Merge the result shards and write the summaries once the scheduler returned.'''
+    logger = utils.LLMBenchLogger(None)
+    for run_key, result_path in result_paths.items():
+        merge_live_results(scheduler, result_path, run_key, logger)
+        save_game_summary(scheduler.progress[run_key], result_path)
+    for cell, run_keys in cell_runs:
+        cell.save_status([(scheduler.progress[k], result_paths[k]) for k in run_keys])
+    save_run_manifest(scheduler, result_paths, args)
 
 
 def main(args):
     if args.api_keys:
-        for k in args.api_keys:
-            if k.startswith('sk-'):
-                os.environ["OPENAI_API_KEY"] = k
-            elif k.startswith('esecret'):
-                os.environ["ANYSCALE_API_KEY"] = k
-            else:
-                os.environ["DEEPINFRA_API_KEY"] = k
-
-    utils.set_seed(args.seed)
-
-    for game_name in args.game_names:
-        run_game(game_name)
+        set_api_keys(args.api_keys)
+
+    if args.job_queue is not None and args.role == 'worker':
+        run_worker(JobQueue(args.job_queue, lease_seconds=args.lease_seconds), args)
+        return
+
+    scheduler, result_paths, cell_runs = start_experiment(args)
+    if args.dry_run:
+        save_dry_run(scheduler, args)
+        return
+    install_drain_handlers(scheduler)
+    scheduler.run()
+    finish_experiment(scheduler, args, result_paths, cell_runs)
+    if scheduler.abandoned:
+        # worker threads still blocked in a match would keep the interpreter alive
+        utils.LLMBenchLogger(None).info(
+            f'{len(scheduler.abandoned)} matches did not finish within the grace period')
+        os._exit(130)
+
+
+def save_dry_run(scheduler, args):
+    '''
+    Predict the registered runs from the agents' query patterns and the
+    statistics of earlier result files, per run and per game and model.
+    '''
+    logger = utils.LLMBenchLogger(None)
+    stats = QueryStats()
+    scheduled = collections.Counter(run_key for run_key, _ in scheduler.pending)
+    plans = {run_key: params for run_key, params in scheduler.pending}
+
+    def known(value, prefix=''):
+        return 'unknown' if value is None else f'{prefix}{value}'
+
+    runs = {}
+    totals = collections.defaultdict(collections.Counter)
+    sequential_seconds = 0
+    for run_key, num_matches in scheduled.items():
+        params = plans[run_key]
+        stats.load(params['args'].exp_root)
+        run = estimate_run(params['run_plan'], num_matches, stats,
+                           scheduler.progress[run_key].expected_duration())
+        runs[run_key] = run
+        if run['sequential_seconds'] is None or sequential_seconds is None:
+            sequential_seconds = None
+        else:
+            sequential_seconds += run['sequential_seconds']
+        for seat in run['seats']:
+            total = totals[f"{params['game_name']}/{seat['model']}"]
+            for key in ['queries', 'api_calls', 'prompt_tokens', 'completion_tokens', 'cost_usd']:
+                # unknown values make the total unknown
+                if seat[key] is None or total.get(key, 0) is None:
+                    total[key] = None
+                else:
+                    total[key] += seat[key]
+        logger.info(f"[{run_key}] {num_matches} matches: " + ', '.join(
+            f"{s['agent']}/{s['model']} {s['queries']} queries, {s['api_calls']} calls, "
+            f"{known(s['prompt_tokens'])} prompt + {known(s['completion_tokens'])} completion tokens, "
+            f"cost {known(s['cost_usd'], '$')}"
+            for s in run['seats']))
+
+    wall_seconds = None
+    if sequential_seconds is not None:
+        wall_seconds = sequential_seconds / max(1, args.num_workers)
+        logger.info(f'{sum(scheduled.values())} matches, predicted wall time '
+                    f'{datetime.timedelta(seconds=round(wall_seconds))} with {args.num_workers} workers')
+    else:
+        logger.info('wall time unknown: no earlier durations or query latencies for some runs')
+    estimate = {'runs': runs,
+                'per_game_and_model': {k: dict(v) for k, v in totals.items()},
+                'sequential_seconds': sequential_seconds,
+                'wall_seconds': wall_seconds,
+                'num_workers': args.num_workers}
+    pathlib.Path(args.exp_root).mkdir(parents=True, exist_ok=True)
+    utils.write_json_atomic(estimate, os.path.join(args.exp_root, 'dry_run.json'))
+
+
+def install_drain_handlers(scheduler):
+    # the handler only sets flags, so a result being written is never cut short
+    def handle(signum, frame):
+        scheduler.request_drain(signal.Signals(signum).name)
+
+    for signum in [signal.SIGINT, signal.SIGTERM]:
+        signal.signal(signum, handle)
+
+
+def save_run_manifest(scheduler, result_paths, args):
+    '''
+    Record how the run ended. `--resume-from` replays the same command line
+    with --resume, which schedules exactly the unfinished matches.
+    '''
+    manifest = {
+        'status': 'interrupted' if scheduler.drain_reason else
+                  'failed' if any(p.failed for p in scheduler.progress.values()) else 'complete',
+        'reason': scheduler.drain_reason,
+        'updated': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'argv': args.argv,
+        'runs': {run_key: {**scheduler.progress[run_key].to_dict(), 'result_path': result_path}
+                 for run_key, result_path in result_paths.items()},
+        'unfinished': scheduler.unfinished()
+    }
+    pathlib.Path(args.exp_root).mkdir(parents=True, exist_ok=True)
+    utils.write_json_atomic(manifest, os.path.join(args.exp_root, 'run_manifest.json'))
+
+
+def run_worker(job_queue, args):
+    # jobs carry their configs and result paths, the worker only plays them
+    pathlib.Path(args.exp_root).mkdir(parents=True, exist_ok=True)
+    utils.LLMBenchLogger(os.path.join(
+        args.exp_root, f'worker_{socket.gethostname()}_{os.getpid()}.log'))
+    run_queue_worker(job_queue, run_match, num_threads=args.num_workers,
+                     idle_timeout=args.worker_idle_timeout)
+
+
+def save_game_summary(progress, result_path):
+    summary_path = os.path.splitext(result_path)[0] + '.summary.json'
+    with open(summary_path, 'w') as file:
+        json.dump(progress.to_dict(), file, indent=2)
 
 
 if __name__ == '__main__':
-    args = get_args()
-    main(args)
+    main(get_args())
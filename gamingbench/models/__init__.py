@@ -1 +1,5 @@
-from gamingbench.models.llm_model import LLMModel
+from gamingbench.utils.lazy import lazy_classes
+
+__getattr__ = lazy_classes(__name__, {
+    'LLMModel': 'gamingbench.models.llm_model',
+})
@@ -1,7 +1,17 @@
 import re
+import asyncio
+import contextlib
+import contextvars
+import weakref
 from gamingbench.chat.chat import chat_llm
 from gamingbench.utils.history_tracker import Query
 
+# per event loop: llm_model_path -> semaphore shared by all instances of a model
+_semaphores = weakref.WeakKeyDictionary()
+# per match coroutine: the --model-concurrency of its experiment, used when
+# a model config does not set max_concurrency
+default_max_concurrency = contextvars.ContextVar('default_max_concurrency', default=None)
+
 
 class BaseModel(object):
 
@@ -13,6 +23,32 @@ class BaseModel(object):
         self.nick_name = config.nick_name
         # Support for additional model kwargs (e.g., reasoning settings)
         self.model_kwargs = getattr(config, 'model_kwargs', None)
+        self.max_concurrency = getattr(config, 'max_concurrency', None)
+        # transient provider failures are retried with exponential backoff
+        self.max_retries = getattr(config, 'max_retries', 4)
+        self.retry_delay = getattr(config, 'retry_delay', 2)
+        # greedy decoding alone does not make providers reproducible, so a
+        # model is only treated as deterministic when its config says so
+        self.deterministic = getattr(config, 'deterministic', False)
 
     def query(self, messages, n, stop, prompt_type):
         pass
+
+    def is_deterministic(self):
+        return bool(self.deterministic) and self.temperature == 0
+
+    async def aquery(self, messages, n, stop, prompt_type):
+        return await asyncio.to_thread(self.query, messages, n, stop, prompt_type)
+
+    def concurrency_limit(self):
+        '''
+        Async context manager bounding the number of in-flight queries to
+        this model across all matches of the running event loop.
+        '''
+        limit = self.max_concurrency or default_max_concurrency.get()
+        if not limit:
+            return contextlib.nullcontext()
+        semaphores = _semaphores.setdefault(asyncio.get_running_loop(), {})
+        if self.model_path not in semaphores:
+            semaphores[self.model_path] = asyncio.Semaphore(limit)
+        return semaphores[self.model_path]
@@ -1,23 +1,65 @@
+import asyncio
+import json
+import weakref
 from gamingbench.models.base_model import BaseModel
-from gamingbench.chat.chat import chat_llm
+from gamingbench.chat.chat import chat_llm, achat_llm, build_chat
+from gamingbench.utils import utils
+from gamingbench.utils.failures import call_with_retries, acall_with_retries
 
 
 class LLMModel(BaseModel):
     def __init__(self, config):
         super().__init__(config)
+        # provider clients, kept so that their connections stay open between queries
+        self._chats = {}
+        # async clients are bound to the event loop they were first used in
+        self._async_chats = weakref.WeakKeyDictionary()
+
+    def get_chat(self, n, loop=None):
+        chats = self._chats if loop is None else self._async_chats.setdefault(loop, {})
+        key = (self.model_path, self.temperature, self.max_tokens, n, self.timeout,
+               json.dumps(self.model_kwargs, sort_keys=True, default=str))
+        if key not in chats:
+            chats[key], _ = build_chat(self.model_path, self.temperature, self.max_tokens,
+                                       n, self.timeout, self.model_kwargs)
+        return chats[key]
 
     def query(self, messages, n, stop, prompt_type):
         assert prompt_type in ['move', 'plan', 'vote']
-        responses = chat_llm(
-            messages=messages,
-            model=self.model_path,
-            temperature=self.temperature,
-            max_tokens=self.max_tokens,
-            n=n,
-            timeout=self.timeout,
-            stop=stop,
-            model_kwargs=self.model_kwargs  # Pass model_kwargs from config
-        )
+        responses = call_with_retries(
+            lambda: chat_llm(
+                messages=messages,
+                model=self.model_path,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                n=n,
+                timeout=self.timeout,
+                stop=stop,
+                model_kwargs=self.model_kwargs,  # Pass model_kwargs from config
+                chat=self.get_chat(n)
+            ),
+            max_retries=self.max_retries, delay=self.retry_delay, logger=utils.LLMBenchLogger(None))
+        generations = responses['generations']
+        completion_tokens = responses['completion_tokens']
+        prompt_tokens = responses['prompt_tokens']
+        return generations, completion_tokens, prompt_tokens
+
+    async def aquery(self, messages, n, stop, prompt_type):
+        assert prompt_type in ['move', 'plan', 'vote']
+        async with self.concurrency_limit():
+            responses = await acall_with_retries(
+                lambda: achat_llm(
+                    messages=messages,
+                    model=self.model_path,
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens,
+                    n=n,
+                    timeout=self.timeout,
+                    stop=stop,
+                    model_kwargs=self.model_kwargs,
+                    chat=self.get_chat(n, asyncio.get_running_loop())
+                ),
+                max_retries=self.max_retries, delay=self.retry_delay, logger=utils.LLMBenchLogger(None))
         generations = responses['generations']
         completion_tokens = responses['completion_tokens']
         prompt_tokens = responses['prompt_tokens']
@@ -11,9 +11,9 @@ def _construct_head_prompt():
 def construct_observation_prompt(observations):
 
     card_mapping = {
-        '0': 'Jack (J)',
-        '1': 'Queen (Q)',
-        '2': 'King (K)'
+        0: 'Jack (J)',
+        1: 'Queen (Q)',
+        2: 'King (K)'
     }
 
     card = card_mapping[observations['card']]
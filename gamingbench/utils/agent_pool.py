@@ -0,0 +1,73 @@
+import threading
+
+from gamingbench.utils import utils
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_agent_pool(run_plan):
+    with _pools_lock:
+        pool = _pools.get(run_plan.spec)
+        # a plan compiled again from edited configs gets new agents
+        if pool is None or pool.run_plan is not run_plan:
+            pool = _pools[run_plan.spec] = AgentPool(run_plan)
+        return pool
+
+
+class AgentPool:
+    '''
+    Hands out agents and models for one match at a time. Instances are built
+    on first use and returned to the pool after the match, so every worker
+    (thread, process or concurrent coroutine) reuses warm instances while
+    stateful agents (e.g. the MCTS bot and its random state) are never shared
+    between matches running in parallel.
+    '''
+
+    def __init__(self, run_plan) -> None:
+        self.run_plan = run_plan
+        self._free = {False: [], True: []}
+        self._lock = threading.Lock()
+
+    def build(self, reversed_order=False):
+        agent_configs, model_configs = self.run_plan.get_configs(reversed_order)
+        game = self.run_plan.game_prototype.game
+        agents = [utils.build_agent(config, game=game)
+                  for config in agent_configs]
+        models = [utils.build_model(config) for config in model_configs]
+        for a, m in zip(agents, models):
+            a.set_model(m)
+        return agents, models
+
+    def acquire(self, reversed_order=False, rngs=None):
+        with self._lock:
+            free = self._free[reversed_order]
+            instances = free.pop() if free else None
+        if instances is None:
+            instances = self.build(reversed_order)
+        rngs = rngs or [None] * len(instances[0])
+        for agent, rng in zip(instances[0], rngs):
+            agent.reset(rng)
+        return instances
+
+    def release(self, instances, reversed_order=False):
+        with self._lock:
+            self._free[reversed_order].append(instances)
+
+    def is_deterministic(self):
+        '''
+        True when every match of the plan with the same seat order plays the
+        same: the game has no chance nodes and every agent is deterministic.
+        '''
+        import pyspiel
+        chance_mode = self.run_plan.game_prototype.game.get_type().chance_mode
+        if chance_mode != pyspiel.GameType.ChanceMode.DETERMINISTIC:
+            return False
+        instances = self.acquire(False)
+        try:
+            return all(agent.is_deterministic() for agent in instances[0])
+        finally:
+            self.release(instances, False)
+
+    def __reduce__(self):
+        return get_agent_pool, (self.run_plan,)
@@ -0,0 +1,64 @@
+import collections
+import json
+import os
+
+from gamingbench.utils.result_stats import load_sums
+
+
+class DurationModel:
+    '''
+    Expected match durations learned from the `duration_seconds` of earlier
+    result files, per (game, agent, model) seat and per game. A matchup
+    is expected to take the mean of its seats' durations.
+    '''
+
+    def __init__(self) -> None:
+        self._sums = collections.defaultdict(lambda: [0.0, 0])
+        self._loaded_roots = set()
+
+    def add_record(self, record):
+        duration = record['matches'][0].get('duration_seconds', 0)
+        if not duration:
+            return
+        game = record['game_config']['game_name']
+        keys = [(game,)] + [(game, a['agent_name'], m['nick_name'])
+                            for a, m in zip(record['agents_config'], record['models_config'])]
+        for key in keys:
+            self._sums[key][0] += duration
+            self._sums[key][1] += 1
+
+    @classmethod
+    def summarize(cls, result_path):
+        '''Sums of the records of one result file.'''
+        model = cls()
+        with open(result_path, 'r') as f:
+            for line in f:
+                try:
+                    model.add_record(json.loads(line))
+                except (json.JSONDecodeError, KeyError, IndexError, TypeError):
+                    continue
+        return model._sums
+
+    def load(self, root):
+        '''Learn from every result file under `root`, once per root.'''
+        root = os.path.abspath(root)
+        if root in self._loaded_roots or not os.path.isdir(root):
+            return
+        self._loaded_roots.add(root)
+        for key, (total, count) in load_sums(root, 'durations', self.summarize).items():
+            self._sums[key][0] += total
+            self._sums[key][1] += count
+
+    def mean(self, key):
+        total, count = self._sums.get(key, (0.0, 0))
+        return total / count if count else None
+
+    def expected(self, run_plan):
+        game = run_plan.game_config.game_name
+        agent_configs, model_configs = run_plan.get_configs(False)
+        seats = [self.mean((game, a.agent_name, m.nick_name))
+                 for a, m in zip(agent_configs, model_configs)]
+        seats = [s for s in seats if s is not None]
+        if seats:
+            return sum(seats) / len(seats)
+        return self.mean((game,))
@@ -0,0 +1,182 @@
+import collections
+import json
+import os
+
+import numpy as np
+
+from gamingbench.chat.chat import estimate_prompt_tokens, is_iterated_query
+from gamingbench.utils import utils
+from gamingbench.utils.result_stats import load_sums
+
+
+class QueryStats:
+    '''
+    Statistics of earlier result files used by --dry-run: steps per match of
+    every (game, agent, model) seat, API calls per step of every (agent,
+    model), tokens per call of every (model, prompt type) and seconds per
+    call of every model.
+    '''
+
+    def __init__(self) -> None:
+        self._means = collections.defaultdict(lambda: [0.0, 0])
+        self._loaded_roots = set()
+
+    def _add(self, key, value, count=1):
+        self._means[key][0] += value
+        self._means[key][1] += count
+
+    def mean(self, *keys):
+        '''Mean of the first key with observations.'''
+        for key in keys:
+            total, count = self._means.get(key, (0.0, 0))
+            if count:
+                return total / count
+        return None
+
+    def add_record(self, record):
+        match = record['matches'][0]
+        game = record['game_config']['game_name']
+        model_paths = {m['nick_name']: m['llm_model_path'] for m in record['models_config']}
+        seat_steps = collections.Counter()
+        seat_calls = collections.Counter()
+        match_calls = 0
+        for step in match['steps']:
+            seat = (step['agent'], step['model_name'])
+            seat_steps[seat] += 1
+            model_path = model_paths.get(step['model_name']) or ''
+            for query in step['queries']:
+                n = len(query['llm_output'])
+                calls = n if n > 1 and is_iterated_query(model_path) else 1
+                prompt_tokens = estimate_prompt_tokens(query['messages']) * calls
+                completion_tokens = max(query['token_size'] - prompt_tokens, 0)
+                for model in [step['model_name'], None]:
+                    self._add(('prompt_tokens', model, query['prompt_type']), prompt_tokens, calls)
+                    self._add(('completion_tokens', model, query['prompt_type']), completion_tokens, calls)
+                seat_calls[seat] += calls
+                match_calls += calls
+        if match['status'] != 'Normal':
+            return
+        # in self-play both seats share one key
+        seat_count = collections.Counter(
+            (a['agent_name'], m['nick_name']) for a, m in zip(record['agents_config'], record['models_config']))
+        for seat, steps in seat_steps.items():
+            self._add(('steps', game) + seat, steps, seat_count[seat] or 1)
+            self._add(('calls_per_step',) + seat, seat_calls[seat], steps)
+        self._add(('steps', game), sum(seat_steps.values()), len(record['agents_config']))
+        # the match duration is spread over its API calls
+        duration = match.get('duration_seconds', 0)
+        if duration and match_calls:
+            for seat, calls in seat_calls.items():
+                self._add(('seconds_per_call', seat[1]), duration * calls / match_calls, calls)
+
+    @classmethod
+    def summarize(cls, result_path):
+        '''Sums of the records of one result file.'''
+        stats = cls()
+        with open(result_path, 'r') as f:
+            for line in f:
+                try:
+                    stats.add_record(json.loads(line))
+                except (json.JSONDecodeError, KeyError, IndexError, TypeError):
+                    continue
+        return stats._means
+
+    def load(self, root):
+        root = os.path.abspath(root)
+        if root in self._loaded_roots or not os.path.isdir(root):
+            return
+        self._loaded_roots.add(root)
+        for key, (total, count) in load_sums(root, 'query_stats', self.summarize).items():
+            self._add(key, total, count)
+
+
+def simulate_steps_per_seat(game, num_matches=20, seed=0, max_steps=10000):
+    '''Mean number of decisions per player when every player moves at random.'''
+    rng = np.random.default_rng(seed)
+    decisions = np.zeros(game.num_players())
+    for _ in range(num_matches):
+        state = game.new_initial_state()
+        for _ in range(max_steps):
+            if state.is_terminal():
+                break
+            if state.is_chance_node():
+                actions, probs = zip(*state.chance_outcomes())
+                state.apply_action(rng.choice(actions, p=probs))
+            elif state.is_simultaneous_node():
+                state.apply_actions([rng.choice(state.legal_actions(p))
+                                     for p in range(game.num_players())])
+                decisions += 1
+            else:
+                decisions[state.current_player()] += 1
+                state.apply_action(rng.choice(state.legal_actions()))
+    return (decisions / num_matches).tolist()
+
+
+def estimate_run(run_plan, num_matches, stats, expected_duration=None):
+    '''
+    Predicted queries, API calls, tokens, cost and sequential match time
+    of `num_matches` matches of one run, per seat. Values that neither the
+    configs nor earlier runs can tell are None.
+    '''
+    game = run_plan.game_config.game_name
+    agent_configs, model_configs = run_plan.get_configs(False)
+    simulated = None
+    seats = []
+    for seat, (agent_config, model_config) in enumerate(zip(agent_configs, model_configs)):
+        agent = utils.build_agent(agent_config, game=run_plan.game_prototype.game)
+        pattern = agent.query_pattern()
+        nick_name = model_config.nick_name
+        steps = stats.mean(('steps', game, agent.agent_name, nick_name), ('steps', game))
+        if steps is None:
+            if simulated is None:
+                simulated = simulate_steps_per_seat(run_plan.game_prototype.game)
+            steps = simulated[seat]
+        iterated = is_iterated_query(model_config.llm_model_path or '')
+        pattern_calls = [n if n > 1 and iterated else 1 for _, n in pattern]
+        observed = stats.mean(('calls_per_step', agent.agent_name, nick_name))
+        # observed calls include retries after unparsable answers
+        retry_factor = observed / sum(pattern_calls) if pattern and observed else 1
+        scale = retry_factor * steps * num_matches
+
+        # a retry is one more query as well as more calls
+        queries = len(pattern) * scale
+        calls = sum(pattern_calls) * scale
+        prompt_tokens = completion_tokens = 0
+        for (prompt_type, _), n_calls in zip(pattern, pattern_calls):
+            per_call_prompt = stats.mean(('prompt_tokens', nick_name, prompt_type),
+                                         ('prompt_tokens', None, prompt_type))
+            per_call_completion = stats.mean(('completion_tokens', nick_name, prompt_type))
+            if per_call_prompt is None or per_call_completion is None:
+                prompt_tokens = completion_tokens = None
+                break
+            prompt_tokens += per_call_prompt * n_calls * scale
+            completion_tokens += per_call_completion * n_calls * scale
+        cost = None if pattern else 0
+        if prompt_tokens is not None and 'prompt_price' in model_config and 'completion_price' in model_config:
+            cost = (prompt_tokens * model_config.prompt_price +
+                    completion_tokens * model_config.completion_price) / 1e6
+        seconds_per_call = stats.mean(('seconds_per_call', nick_name))
+        seats.append({
+            'agent': agent.agent_name,
+            'model': nick_name,
+            'steps_per_match': round(steps, 2),
+            'queries': round(queries),
+            'api_calls': round(calls),
+            'prompt_tokens': None if prompt_tokens is None else round(prompt_tokens),
+            'completion_tokens': None if completion_tokens is None else round(completion_tokens),
+            'cost_usd': None if cost is None else round(cost, 2),
+            'llm_seconds': None if seconds_per_call is None or not pattern else round(calls * seconds_per_call, 1),
+        })
+
+    sequential_seconds = None
+    if expected_duration is not None:
+        sequential_seconds = expected_duration * num_matches
+    elif all(s['llm_seconds'] is not None or s['queries'] == 0 for s in seats):
+        # only the LLM time is known, the agents' own compute is left out
+        sequential_seconds = sum(s['llm_seconds'] or 0 for s in seats)
+    return {
+        'game': game,
+        'matches': num_matches,
+        'seats': seats,
+        'sequential_seconds': None if sequential_seconds is None else round(sequential_seconds, 1),
+    }
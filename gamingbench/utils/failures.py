@@ -0,0 +1,85 @@
+import asyncio
+import random
+import time
+import traceback
+
+TRANSIENT = 'transient'
+MATCH_FATAL = 'match'
+RUN_FATAL = 'run'
+
+# provider and HTTP client exceptions, matched by class name so that no
+# provider package has to be imported
+TRANSIENT_NAMES = {'APIConnectionError', 'APITimeoutError', 'RateLimitError', 'InternalServerError',
+                   'ServiceUnavailableError', 'Timeout', 'ReadTimeout', 'ConnectTimeout',
+                   'TimeoutException', 'NetworkError', 'RemoteProtocolError', 'ConnectionError'}
+RUN_FATAL_NAMES = {'AuthenticationError', 'PermissionDeniedError', 'NotFoundError'}
+
+
+def classify(error):
+    '''
+    TRANSIENT failures are worth retrying the same query (network, time-outs,
+    rate limits, server errors). RUN_FATAL ones fail every match of the run
+    alike (missing API key or provider package, rejected credentials,
+    unknown model). Anything else is MATCH_FATAL: this match is lost and
+    played again.
+    '''
+    names = {cls.__name__ for cls in type(error).__mro__}
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if not isinstance(status, int):
+        status = None
+    if names & RUN_FATAL_NAMES or status in (401, 403, 404) or isinstance(error, (ImportError, MemoryError)):
+        return RUN_FATAL
+    if isinstance(error, KeyError) and str(error.args[0] if error.args else '').endswith('_API_KEY'):
+        return RUN_FATAL
+    if names & TRANSIENT_NAMES or isinstance(error, (TimeoutError, ConnectionError)):
+        return TRANSIENT
+    if status is not None and (status == 429 or status >= 500):
+        return TRANSIENT
+    return MATCH_FATAL
+
+
+def describe(error):
+    '''Failure kind, type, message and traceback of an exception, for result records.'''
+    kind = classify(error)
+    return {
+        # transient failures that outlived their retries only cost the match
+        'kind': MATCH_FATAL if kind == TRANSIENT else kind,
+        'type': type(error).__name__,
+        'message': str(error),
+        'traceback': ''.join(traceback.format_exception(error))
+    }
+
+
+def backoff(attempt, delay, max_delay=60):
+    # full jitter keeps workers that failed together from retrying together
+    return random.uniform(0, min(max_delay, delay * 2 ** attempt))
+
+
+def call_with_retries(fn, max_retries=4, delay=2, logger=None):
+    '''Call `fn`, retrying transient failures with exponential backoff.'''
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == max_retries or classify(e) != TRANSIENT:
+                raise
+            wait = backoff(attempt, delay)
+            if logger is not None:
+                logger.info(f'transient {type(e).__name__}: {e}; retry {attempt + 1}/{max_retries} in {wait:.1f}s')
+            time.sleep(wait)
+
+
+async def acall_with_retries(fn, max_retries=4, delay=2, logger=None):
+    '''Asynchronous `call_with_retries` for a coroutine function.'''
+    for attempt in range(max_retries + 1):
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt == max_retries or classify(e) != TRANSIENT:
+                raise
+            wait = backoff(attempt, delay)
+            if logger is not None:
+                logger.info(f'transient {type(e).__name__}: {e}; retry {attempt + 1}/{max_retries} in {wait:.1f}s')
+            await asyncio.sleep(wait)
@@ -1,6 +1,8 @@
+import itertools
 import json
 import time
 from collections import defaultdict
+from collections.abc import Sequence
 
 
 class Query:
@@ -29,6 +31,58 @@ class Query:
         return self.to_dict()
 
 
+class MoveLog:
+    '''
+    Append-only moves of one player. Its views are snapshots that share the
+    log, so that every step can keep the history so far without a copy.
+    '''
+
+    def __init__(self) -> None:
+        self._moves = []
+
+    def append(self, move):
+        self._moves.append(move)
+
+    def view(self):
+        return MoveView(self._moves, len(self._moves))
+
+
+class MoveView(Sequence):
+    '''The first `length` moves of a MoveLog, immutable: later moves do not show.'''
+    __slots__ = ('_moves', '_length')
+
+    def __init__(self, moves, length) -> None:
+        self._moves = moves
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('move index out of range')
+        return self._moves[index]
+
+    def __iter__(self):
+        return itertools.islice(self._moves, self._length)
+
+    def __eq__(self, other):
+        if isinstance(other, (MoveView, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __reduce__(self):
+        # pickle only the moves of the view
+        return MoveView, (list(self), self._length)
+
+
 class Step:
     def __init__(self, agent: str, observation: str = "", move: str = "") -> None:
         self.agent = agent                       # agents name
@@ -54,8 +108,12 @@ class Step:
         return self.token_size
 
     def to_dict(self):
+        observation = self.observation
+        if isinstance(observation, dict):
+            observation = {k: list(v) if isinstance(v, MoveView) else v
+                           for k, v in observation.items()}
         return {"agent": self.agent,
-                "observation": self.observation,
+                "observation": observation,
                 "move": self.move,
                 "queries": [q.to_dict() for q in self.queries],
                 "token_size": self.get_token_size(),
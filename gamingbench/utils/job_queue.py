@@ -0,0 +1,184 @@
+import json
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+
+from gamingbench.utils import utils
+
+
+class JobQueue:
+    '''
+    Match queue in a SQLite file shared by a coordinator and any number of
+    worker processes, possibly on other nodes. Workers claim jobs with a
+    lease that they keep alive with heartbeats; a job whose lease expired
+    (e.g. its node crashed) is handed out again by the next claim.
+    '''
+
+    def __init__(self, path, lease_seconds=300) -> None:
+        self.path = path
+        self.lease_seconds = lease_seconds
+        with self._connect() as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS jobs (
+                job_key TEXT PRIMARY KEY,
+                payload BLOB NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                collected INTEGER NOT NULL DEFAULT 0)''')
+            conn.execute('''CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT)''')
+
+    def _connect(self):
+        # one short-lived connection per operation, so any thread can use the queue
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        conn.execute('PRAGMA busy_timeout = 60000')
+        return _Transaction(conn)
+
+    # coordinator side
+
+    def reset(self):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM jobs')
+            conn.execute('DELETE FROM meta')
+
+    def enqueue(self, job_key, params):
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO jobs (job_key, payload) VALUES (?, ?)',
+                         (job_key, pickle.dumps(params)))
+
+    def cancel(self, job_key):
+        '''Remove a job that no worker has claimed yet.'''
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE job_key = ? AND status = 'pending'", (job_key,))
+            return cursor.rowcount == 1
+
+    def collect(self):
+        '''Return (job_key, match summary) of finished jobs not collected so far.'''
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT job_key, result FROM jobs WHERE status = 'done' AND collected = 0").fetchall()
+            conn.executemany('UPDATE jobs SET collected = 1 WHERE job_key = ?',
+                             [(job_key,) for job_key, _ in rows])
+        return [(job_key, json.loads(result)) for job_key, result in rows]
+
+    def close(self):
+        '''Tell workers that no more jobs will be added.'''
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('closed', '1')")
+
+    # worker side
+
+    def is_closed(self):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'closed'").fetchone()
+        return row is not None
+
+    def claim(self, worker_id):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT job_key, payload FROM jobs WHERE status = 'pending' "
+                "OR (status = 'running' AND lease_expires < ?) ORDER BY rowid LIMIT 1",
+                (now,)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE job_key = ?",
+                (worker_id, now + self.lease_seconds, row[0]))
+        return row[0], pickle.loads(row[1])
+
+    def heartbeat(self, job_key, worker_id):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE job_key = ? AND worker = ? "
+                "AND status = 'running'",
+                (time.time() + self.lease_seconds, job_key, worker_id))
+
+    def complete(self, job_key, worker_id, summary):
+        # only the current lease holder commits; a worker whose lease was
+        # reclaimed in the meantime drops its result
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', result = ? WHERE job_key = ? AND worker = ? "
+                "AND status = 'running'",
+                (json.dumps(summary), job_key, worker_id))
+            return cursor.rowcount == 1
+
+
+class _Transaction:
+    '''Runs the statements of a `with` block in one immediate transaction.'''
+
+    def __init__(self, conn) -> None:
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        finally:
+            self.conn.close()
+
+
+def run_queue_worker(job_queue, worker, num_threads=1, idle_timeout=60, poll_interval=2):
+    '''
+    Claim and run jobs until the coordinator closed the queue and it is
+    drained, or until nothing could be claimed for `idle_timeout` seconds.
+    '''
+    logger = utils.LLMBenchLogger(None)
+    worker_id = f'{socket.gethostname()}-{os.getpid()}'
+    active = {}
+    active_lock = threading.Lock()
+    stop = threading.Event()
+
+    def heartbeat_loop():
+        while not stop.wait(job_queue.lease_seconds / 3):
+            with active_lock:
+                leases = list(active.items())
+            for job_key, thread_id in leases:
+                # a failed heartbeat must not end the thread, the lease would expire
+                try:
+                    job_queue.heartbeat(job_key, thread_id)
+                except Exception as e:
+                    logger.info(f'heartbeat for {job_key} failed: {e}')
+
+    def claim_loop(thread_idx):
+        thread_id = f'{worker_id}-{thread_idx}'
+        idle_since = time.time()
+        while True:
+            job = job_queue.claim(thread_id)
+            if job is None:
+                if job_queue.is_closed() or time.time() - idle_since > idle_timeout:
+                    return
+                time.sleep(poll_interval)
+                continue
+            job_key, params = job
+            with active_lock:
+                active[job_key] = thread_id
+            try:
+                summary, _ = worker(params)
+                if not job_queue.complete(job_key, thread_id, summary):
+                    logger.info(f'lease of {job_key} was lost, result dropped')
+            finally:
+                with active_lock:
+                    active.pop(job_key, None)
+            idle_since = time.time()
+
+    heartbeat = threading.Thread(target=heartbeat_loop, daemon=True)
+    heartbeat.start()
+    threads = [threading.Thread(target=claim_loop, args=(i,)) for i in range(num_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stop.set()
@@ -0,0 +1,17 @@
+import importlib
+import sys
+
+
+def lazy_classes(package, classes):
+    '''
+    Module `__getattr__` for a package whose classes are imported on first
+    access, so that importing the package does not load pyspiel, open_spiel
+    or langchain. `classes` maps class names to their module names.
+    '''
+    def __getattr__(name):
+        if name not in classes:
+            raise AttributeError(f'module {package!r} has no attribute {name!r}')
+        cls = getattr(importlib.import_module(classes[name]), name)
+        setattr(sys.modules[package], name, cls)
+        return cls
+    return __getattr__
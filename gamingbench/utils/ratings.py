@@ -0,0 +1,44 @@
+from collections import defaultdict
+
+
+class EloRatings:
+    '''
+    Elo ratings updated match by match as results arrive. Scores are from
+    the point of view of the first entrant: 1 win, 0.5 draw, 0 loss.
+    '''
+
+    def __init__(self, k=16, initial_rating=1500) -> None:
+        self.k = k
+        self.initial_rating = initial_rating
+        self.ratings = {}
+        self.record = defaultdict(lambda: {"wins": 0, "draws": 0, "losses": 0})
+
+    def add_entrant(self, name):
+        self.ratings.setdefault(name, self.initial_rating)
+
+    def expected_score(self, a, b):
+        return 1 / (1 + 10 ** ((self.ratings[b] - self.ratings[a]) / 400))
+
+    def update(self, a, b, score_a):
+        self.add_entrant(a)
+        self.add_entrant(b)
+        delta = self.k * (score_a - self.expected_score(a, b))
+        self.ratings[a] += delta
+        self.ratings[b] -= delta
+        for name, score in [(a, score_a), (b, 1 - score_a)]:
+            if score == 1:
+                self.record[name]["wins"] += 1
+            elif score == 0:
+                self.record[name]["losses"] += 1
+            else:
+                self.record[name]["draws"] += 1
+
+    def standings(self):
+        return sorted(self.ratings.items(), key=lambda x: x[1], reverse=True)
+
+    def to_dict(self):
+        return {
+            "k": self.k,
+            "standings": [{"entrant": name, "rating": round(rating, 1), **self.record[name]}
+                          for name, rating in self.standings()]
+        }
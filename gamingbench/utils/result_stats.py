@@ -0,0 +1,43 @@
+import collections
+import json
+import os
+import pathlib
+
+from gamingbench.utils import utils
+
+
+def load_sums(root, kind, summarize):
+    '''
+    Sums of `summarize` over every result file under `root`, as key ->
+    [total, count]. The sums of a result file are kept next to it in
+    `<run>.<kind>.json` and only computed again after the file changed, so
+    earlier experiments are not parsed again at every start.
+    '''
+    sums = collections.defaultdict(lambda: [0.0, 0])
+    for path in pathlib.Path(root).rglob('*.jsonl'):
+        for key, (total, count) in cached_file_sums(str(path), kind, summarize).items():
+            sums[key][0] += total
+            sums[key][1] += count
+    return sums
+
+
+def cached_file_sums(result_path, kind, summarize):
+    stat = os.stat(result_path)
+    version = [stat.st_size, stat.st_mtime_ns]
+    cache_path = os.path.splitext(result_path)[0] + f'.{kind}.json'
+    try:
+        with open(cache_path) as f:
+            cached = json.load(f)
+        if cached['version'] == version:
+            return {tuple(key): value for key, value in cached['sums']}
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    sums = summarize(result_path)
+    try:
+        utils.write_json_atomic({'version': version,
+                                 'sums': [[list(key), value] for key, value in sums.items()]},
+                                cache_path)
+    except OSError:
+        # a read-only results directory is parsed every time
+        pass
+    return sums
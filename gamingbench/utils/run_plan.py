@@ -0,0 +1,66 @@
+import os
+import threading
+
+from gamingbench.utils import utils
+
+_plans = {}
+_plans_lock = threading.Lock()
+
+
+def get_run_plan(game_name, game_config_path, agent_config_paths, model_config_paths):
+    '''
+    Returns the plan for these configs, compiling it only on first use in
+    this process or after one of the config files changed. Plans are
+    pickled by their spec, so worker processes resolve them through this
+    cache and stay warm across matches.
+    '''
+    spec = (game_name, game_config_path, tuple(agent_config_paths), tuple(model_config_paths))
+    with _plans_lock:
+        plan = _plans.get(spec)
+        # a long-running process (the daemon) picks up edited configs
+        if plan is None or plan.version != get_config_version(spec):
+            plan = _plans[spec] = RunPlan(*spec)
+        return plan
+
+
+def get_config_version(spec):
+    '''Modification times of the config files of a plan spec.'''
+    game_name, game_config_path, agent_config_paths, model_config_paths = spec
+    return tuple(os.stat(p).st_mtime_ns
+                 for p in [game_config_path, *agent_config_paths, *model_config_paths])
+
+
+class RunPlan:
+    '''
+    Everything a match needs that stays the same for the whole run: the
+    parsed (frozen) game, agent and model configs for both seat orders and a
+    loaded game prototype. run_game compiles it once; run_match only clones
+    the cheap per-match state from it.
+    '''
+
+    def __init__(self, game_name, game_config_path, agent_config_paths, model_config_paths) -> None:
+        self.spec = (game_name, game_config_path,
+                     tuple(agent_config_paths), tuple(model_config_paths))
+        # taken before the configs are read, so an edit while reading compiles the plan again
+        self.version = get_config_version(self.spec)
+        self.game_name = game_name
+        self.game_config = utils.load_config(game_config_path, frozen=True)
+        self.game_prototype = utils.build_game(self.game_config)
+        self.agent_configs = tuple(utils.load_config(p, frozen=True)
+                                   for p in agent_config_paths)
+        self.model_configs = tuple(utils.load_config(p, frozen=True)
+                                   for p in model_config_paths)
+        # exchange first player to mitigate first-player advantage
+        self.reversed_agent_configs = self.agent_configs[::-1]
+        self.reversed_model_configs = self.model_configs[::-1]
+
+    def get_configs(self, reversed_order=False):
+        if reversed_order:
+            return self.reversed_agent_configs, self.reversed_model_configs
+        return self.agent_configs, self.model_configs
+
+    def new_game(self):
+        return self.game_prototype.clone()
+
+    def __reduce__(self):
+        return get_run_plan, self.spec
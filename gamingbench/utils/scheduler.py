@@ -0,0 +1,434 @@
+import asyncio
+import collections
+import concurrent
+import datetime
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from gamingbench.utils import utils
+from gamingbench.utils.durations import DurationModel
+
+
+class SchedulerUnavailable(RuntimeError):
+    '''A call was refused because the scheduler is draining or not serving.'''
+
+
+class RunProgress:
+    def __init__(self, run_key, num_matches, threshold_matches=None, stopping_rule=None,
+                 expected_duration=None, max_match_attempts=3) -> None:
+        self.run_key = run_key
+        self.num_matches = num_matches
+        self.threshold_matches = threshold_matches
+        self.max_match_attempts = max_match_attempts
+        self.stopping_rule = stopping_rule
+        self.stop_reason = None
+        # normal matches the stopping rule had counted when it stopped the run
+        self.decided_after = None
+        # set by the scheduler once no match of the run is queued or running
+        self.done = num_matches == 0
+        self.launched = 0
+        self.finished = 0
+        self.abnormal = 0
+        # matches that raised, and their count per match key
+        self.errors = 0
+        self.error_attempts = collections.Counter()
+        # message of the run-fatal error that stopped the run
+        self.failed = None
+        self.prior_duration = expected_duration
+        self.total_duration = 0.0
+        self.token_size = 0
+        # compact match summaries, the histories are streamed to the result shards
+        self.summaries = []
+
+    def add_result(self, result):
+        self.finished += 1
+        summary = result[0]
+        self.total_duration += summary['duration_seconds']
+        self.token_size += summary['token_size']
+        if summary['status'] == 'Error':
+            self.errors += 1
+            self.error_attempts[summary['match_key']] += 1
+        if summary['failure'] == 'run' and self.failed is None:
+            self.failed = summary['error']
+            self.stop_reason = f'run-fatal error: {summary["error"]}'
+        if summary['status'] != 'Normal':
+            self.abnormal += 1
+        elif self.stopping_rule is not None:
+            # a collapsed deterministic match stands for `weight` identical ones
+            for _ in range(summary['weight']):
+                self.stopping_rule.update(summary['entrant_score'])
+            # matches still running when the run stopped are tallied, they do not revise it
+            if self.stop_reason is None:
+                self.stop_reason = self.stopping_rule.check()
+                if self.stop_reason is not None:
+                    self.decided_after = self.stopping_rule.num_matches
+        self.summaries.append(summary)
+
+    def to_dict(self):
+        res = {
+            "run_key": self.run_key,
+            "scheduled": self.num_matches,
+            "launched": self.launched,
+            "finished": self.finished,
+            "abnormal": self.abnormal,
+            "errors": self.errors,
+            "failed": self.failed,
+            "token_size": self.token_size,
+            "duration_seconds": round(self.total_duration, 2),
+            "stopped_early": self.stop_reason is not None,
+            "stop_reason": self.stop_reason
+        }
+        if self.stopping_rule is not None:
+            res["first_entrant"] = {"wins": self.stopping_rule.wins,
+                                    "draws": self.stopping_rule.draws,
+                                    "losses": self.stopping_rule.losses}
+            res["decided_after"] = self.decided_after
+        return res
+
+    def expected_duration(self):
+        '''Mean duration of this run's finished matches, else the learned prior.'''
+        if self.finished:
+            return self.total_duration / self.finished
+        return self.prior_duration
+
+    def should_retry(self):
+        '''
+        Invalid matches are played again until the run has launched
+        `threshold_matches` matches in total.
+        '''
+        if self.threshold_matches is None or self.stop_reason is not None:
+            return False
+        return self.launched < self.threshold_matches
+
+    def should_replay(self, match_key):
+        '''A match that failed with an error is played again up to `max_match_attempts` times.'''
+        if self.stop_reason is not None:
+            return False
+        return self.error_attempts[match_key] < self.max_match_attempts
+
+    def __str__(self):
+        return f'[{self.run_key}] {self.finished}/{self.num_matches} matches finished, ' \
+               f'{self.abnormal} abnormal, {self.launched} launched'
+
+
+class MatchScheduler:
+    '''
+    Runs the matches of every registered run (one game and one pair of
+    entrants) in one shared worker pool, so the pool stays saturated across
+    games instead of draining after each one.
+    '''
+
+    def __init__(self, worker, num_workers=1, executor='thread', max_tasks_per_child=None,
+                 result_handler=None, job_queue=None, poll_interval=2, grace_period=60) -> None:
+        assert executor in ['thread', 'process', 'async', 'queue']
+        assert executor != 'queue' or job_queue is not None
+        self.worker = worker
+        self.num_workers = max(1, num_workers)
+        self.executor = executor
+        self.max_tasks_per_child = max_tasks_per_child
+        self.result_handler = result_handler
+        self.job_queue = job_queue
+        self.poll_interval = poll_interval
+        self.pending = collections.deque()
+        self.progress = {}
+        self.running = collections.Counter()
+        self.grace_period = grace_period
+        self.drain_reason = None
+        self.drain_deadline = None
+        # (run_key, params) of matches still running when the grace period ran out
+        self.abandoned = []
+        # the abandoned matches whose worker could not be stopped (a thread or a
+        # job queue worker) and may still append its result to the shards
+        self.abandoned_live = []
+        # match durations of earlier runs, used to launch long matches first
+        self.duration_model = DurationModel()
+        self.logger = None
+        # (function, future) to run in the scheduling thread of `serve`
+        self._calls = queue.Queue()
+        # calls are only queued while `serve` will still run them
+        self._calls_lock = threading.Lock()
+        self._serving = False
+
+    def add_run(self, run_key, match_params, threshold_matches=None, stopping_rule=None,
+                expected_duration=None, max_match_attempts=3):
+        self.progress[run_key] = RunProgress(
+            run_key, len(match_params), threshold_matches, stopping_rule, expected_duration,
+            max_match_attempts)
+        for params in match_params:
+            self.pending.append((run_key, params))
+
+    def request_drain(self, reason):
+        '''
+        Stop launching matches; running ones get `grace_period` seconds to
+        finish. A second request gives up on them right away.
+        '''
+        if self.drain_reason is not None:
+            self.drain_deadline = time.time()
+            return
+        self.drain_reason = reason
+        self.drain_deadline = time.time() + self.grace_period
+        if self.logger is not None:
+            self.logger.info(f'{reason}: no new matches are launched, waiting up to '
+                             f'{self.grace_period}s for {sum(self.running.values())} running matches')
+
+    def _can_launch(self, in_flight):
+        return self.pending and len(in_flight) < self.num_workers and self.drain_reason is None
+
+    def _draining_expired(self):
+        return self.drain_deadline is not None and time.time() >= self.drain_deadline
+
+    def unfinished(self):
+        '''Match keys that were queued or running when the run ended.'''
+        return [{'run_key': run_key, 'match_key': params['match_key']}
+                for run_key, params in list(self.pending) + self.abandoned]
+
+    def _submit(self, executor, in_flight):
+        while self._can_launch(in_flight):
+            run_key, params = self.pending.popleft()
+            self.progress[run_key].launched += 1
+            self.running[run_key] += 1
+            future = executor.submit(self.worker, params)
+            in_flight[future] = (run_key, params)
+
+    def _asubmit(self, in_flight):
+        # num_workers bounds the number of concurrent match coroutines
+        while self._can_launch(in_flight):
+            run_key, params = self.pending.popleft()
+            self.progress[run_key].launched += 1
+            self.running[run_key] += 1
+            task = asyncio.ensure_future(self.worker(params))
+            in_flight[task] = (run_key, params)
+
+    async def _arun(self):
+        in_flight = {}
+        self._asubmit(in_flight)
+        # the timeout lets a drain deadline pass while all matches are still running
+        while in_flight and not self._draining_expired():
+            done, _ = await asyncio.wait(
+                in_flight, timeout=1, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                run_key, _ = in_flight.pop(task)
+                self._on_result(run_key, task.result())
+            self._asubmit(in_flight)
+        self.abandoned = list(in_flight.values())
+        for task in in_flight:
+            task.cancel()
+
+    def _qsubmit(self, in_flight):
+        # num_workers bounds the number of jobs waiting in or claimed from the queue
+        while self._can_launch(in_flight):
+            run_key, params = self.pending.popleft()
+            progress = self.progress[run_key]
+            progress.launched += 1
+            self.running[run_key] += 1
+            job_key = f'{run_key}/{params["match_key"]}/{progress.launched}'
+            self.job_queue.enqueue(job_key, params)
+            in_flight[job_key] = (run_key, params)
+
+    def _qrun(self):
+        in_flight = {}
+        self._qsubmit(in_flight)
+        while in_flight and not self._draining_expired():
+            if self.drain_reason is not None:
+                # jobs no worker has claimed yet are taken back
+                for job_key in list(in_flight):
+                    if self.job_queue.cancel(job_key):
+                        run_key, params = in_flight.pop(job_key)
+                        self.running[run_key] -= 1
+                        self.pending.append((run_key, params))
+            collected = self.job_queue.collect()
+            if not collected:
+                time.sleep(self.poll_interval)
+                continue
+            for job_key, summary in collected:
+                run_key, params = in_flight.pop(job_key)
+                self._on_result(run_key, (summary, params))
+            self._qsubmit(in_flight)
+        self.abandoned = self.abandoned_live = list(in_flight.values())
+        self.job_queue.close()
+
+    def _make_executor(self):
+        if self.executor == 'process':
+            # spawn is required for recycling workers after max_tasks_per_child
+            return ProcessPoolExecutor(max_workers=self.num_workers,
+                                       mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_worker_process,
+                                       initargs=(utils.LLMBenchLogger.logger_path,),
+                                       max_tasks_per_child=self.max_tasks_per_child)
+        return ThreadPoolExecutor(max_workers=self.num_workers)
+
+    def _on_result(self, run_key, result):
+        self.running[run_key] -= 1
+        progress = self.progress[run_key]
+        stopped = progress.stop_reason is not None
+        progress.add_result(result)
+        summary, params = result
+        if summary['status'] == 'Error':
+            if progress.should_replay(summary['match_key']):
+                self.pending.append((run_key, params))
+        elif summary['status'] != 'Normal' and progress.should_retry():
+            self.pending.append((run_key, params))
+        self.logger.info(str(progress))
+        remaining = self.predict_remaining()
+        if remaining is not None and (self.pending or sum(self.running.values())):
+            finish = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(time.time() + remaining))
+            self.logger.info(f'predicted completion in {datetime.timedelta(seconds=round(remaining))} (around {finish})')
+        if not stopped and progress.stop_reason is not None:
+            # matches already running finish, nothing new is launched
+            self.pending = collections.deque(
+                p for p in self.pending if p[0] != run_key)
+            self.logger.info(
+                f'[{run_key}] stopping early: {progress.stop_reason}')
+        if not self.running[run_key] and not any(p[0] == run_key for p in self.pending):
+            progress.done = True
+        if self.result_handler is not None:
+            self.result_handler(result)
+
+    def _expected_durations(self):
+        known = {k: p.expected_duration() for k, p in self.progress.items()
+                 if p.expected_duration() is not None}
+        # runs without any history are assumed to be as long as the average run
+        default = sum(known.values()) / len(known) if known else None
+        return {k: known.get(k, default) for k in self.progress}
+
+    def order_pending(self):
+        '''
+        Launch the longest expected matches first so that no long match
+        starts at the end of the run. Unknown durations go first, and the
+        sort is stable, so each run keeps its own (seat-interleaved) order.
+        '''
+        expected = self._expected_durations()
+        self.pending = collections.deque(sorted(
+            self.pending, key=lambda p: -(expected[p[0]] if expected[p[0]] is not None else float('inf'))))
+
+    def predict_remaining(self):
+        '''
+        Seconds until every match is finished with the pool kept full: the
+        expected work left (half of it for running matches) spread over the
+        workers, but never less than the longest match still to start.
+        '''
+        expected = self._expected_durations()
+        if any(v is None for v in expected.values()):
+            return None
+        queued = [expected[run_key] for run_key, _ in self.pending]
+        work = sum(queued) + sum(expected[k] * n / 2 for k, n in self.running.items())
+        return max(work / self.num_workers, max(queued, default=0))
+
+    def call_soon(self, fn):
+        '''
+        Run `fn` in the scheduling thread of `serve`, where runs can be added
+        safely while matches are running. Returns a future of its result.
+        '''
+        future = concurrent.futures.Future()
+        with self._calls_lock:
+            if not self._serving:
+                future.set_exception(SchedulerUnavailable('scheduler is not serving'))
+            else:
+                self._calls.put((fn, future))
+        return future
+
+    def _run_calls(self, timeout):
+        try:
+            calls = [self._calls.get(timeout=timeout) if timeout else self._calls.get_nowait()]
+        except queue.Empty:
+            return
+        while not self._calls.empty():
+            calls.append(self._calls.get_nowait())
+        for fn, future in calls:
+            # the caller gave up waiting
+            if not future.set_running_or_notify_cancel():
+                continue
+            if self.drain_reason is not None:
+                future.set_exception(SchedulerUnavailable(f'scheduler is draining: {self.drain_reason}'))
+                continue
+            try:
+                future.set_result(fn())
+            except Exception as e:
+                future.set_exception(e)
+        self.order_pending()
+
+    def serve(self):
+        '''
+        Keep a thread pool up for runs added through `call_soon` until
+        `request_drain`, so that the runs of many clients share its workers
+        and the agent pools and games they load stay warm.
+        '''
+        self.logger = utils.LLMBenchLogger(None)
+        in_flight = {}
+        executor = ThreadPoolExecutor(max_workers=self.num_workers)
+        with self._calls_lock:
+            self._serving = True
+        try:
+            while (in_flight or self.drain_reason is None) and not self._draining_expired():
+                self._run_calls(timeout=0 if in_flight else 1)
+                self._submit(executor, in_flight)
+                if not in_flight:
+                    continue
+                done, _ = concurrent.futures.wait(
+                    in_flight, timeout=1, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    run_key, _ = in_flight.pop(future)
+                    self._on_result(run_key, future.result())
+        finally:
+            self.abandoned = self.abandoned_live = list(in_flight.values())
+            executor.shutdown(wait=not in_flight, cancel_futures=True)
+            with self._calls_lock:
+                self._serving = False
+        # refuse the calls queued before serving stopped
+        self._run_calls(timeout=0)
+        return self.progress
+
+    def run(self):
+        # the logger is configured with a file path by the first game
+        self.logger = utils.LLMBenchLogger(None)
+        self.order_pending()
+        remaining = self.predict_remaining()
+        if remaining is not None:
+            self.logger.info(f'{len(self.pending)} matches scheduled, '
+                             f'predicted completion in {datetime.timedelta(seconds=round(remaining))}')
+        if self.executor == 'async':
+            asyncio.run(self._arun())
+        elif self.executor == 'queue':
+            self._qrun()
+        else:
+            in_flight = {}
+            executor = self._make_executor()
+            try:
+                self._submit(executor, in_flight)
+                while in_flight and not self._draining_expired():
+                    done, _ = concurrent.futures.wait(
+                        in_flight, timeout=1, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        run_key, _ = in_flight.pop(future)
+                        self._on_result(run_key, future.result())
+                    self._submit(executor, in_flight)
+            finally:
+                self.abandoned = list(in_flight.values())
+                # shutdown forgets the pool's processes, other children of this
+                # process (e.g. the pool of another experiment) are not ours to stop
+                workers = list((getattr(executor, '_processes', None) or {}).values())
+                executor.shutdown(wait=not in_flight, cancel_futures=True)
+                if in_flight and self.executor == 'process':
+                    # worker processes ignore signals, stop the abandoned matches
+                    for worker in workers:
+                        worker.kill()
+                    for worker in workers:
+                        worker.join()
+                else:
+                    self.abandoned_live = self.abandoned
+
+        for progress in self.progress.values():
+            self.logger.info(f'Done: {progress}')
+        return self.progress
+
+
+def _init_worker_process(logger_path):
+    # Ctrl-C and SIGTERM reach the whole process group; the parent decides
+    # how running matches are drained
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    utils.LLMBenchLogger(logger_path)
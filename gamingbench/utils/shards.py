@@ -0,0 +1,138 @@
+import collections
+import heapq
+import json
+import os
+import pathlib
+import socket
+import threading
+
+# shard files a worker thread keeps open at once, across runs
+MAX_OPEN_SHARDS = 16
+
+_local = threading.local()
+
+
+def get_shard_dir(result_path):
+    return os.path.splitext(result_path)[0] + '.shards'
+
+
+def append_record(result_path, record):
+    '''
+    Append a result record to the shard of the calling worker. Every worker
+    thread of every process owns its shard files, so appends need no lock
+    and records of concurrent workers never interleave. Shards stay open
+    across matches and are merged into `result_path` by `merge_shards`.
+    '''
+    writers = getattr(_local, 'writers', None)
+    if writers is None:
+        writers = _local.writers = collections.OrderedDict()
+    shard_path = os.path.join(
+        get_shard_dir(result_path),
+        f'{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}.shard')
+    file = writers.get(shard_path)
+    # a merge removes the shards it consumed
+    if file is not None and not os.path.exists(shard_path):
+        file.close()
+        file = None
+    if file is None:
+        pathlib.Path(os.path.dirname(shard_path)).mkdir(parents=True, exist_ok=True)
+        file = open(shard_path, 'a', buffering=1 << 16)
+        writers[shard_path] = file
+        if len(writers) > MAX_OPEN_SHARDS:
+            writers.popitem(last=False)[1].close()
+    writers.move_to_end(shard_path)
+    file.write(json.dumps(record) + '\n')
+    # the match is reported finished once it returns, so it has to reach the disk
+    file.flush()
+    os.fsync(file.fileno())
+
+
+def match_sort_key(match_key):
+    '''Order match keys by game, match index and seat order.'''
+    if match_key is None:
+        return ('', -1, '')
+    game, match_idx, seat_order = match_key.rsplit(':', 2)
+    return (game, int(match_idx), seat_order)
+
+
+def _index_source(source_idx, path, stats):
+    '''(sort key, source, offset, length, match key, normal) of the intact records of a file.'''
+    entries = []
+    with open(path, 'rb') as file:
+        offset = 0
+        for line in file:
+            length = len(line)
+            try:
+                if not line.endswith(b'\n'):
+                    raise ValueError('truncated record')
+                record = json.loads(line)
+                normal = record['matches'][0]['status'] == 'Normal'
+                match_key = record.get('match_key')
+                sort_key = match_sort_key(match_key)
+            except (ValueError, KeyError, IndexError, TypeError):
+                stats['corrupt'] += 1
+                offset += length
+                continue
+            entries.append((sort_key, source_idx, offset, length, match_key, normal))
+            offset += length
+    entries.sort()
+    return entries
+
+
+def merge_shards(result_path):
+    '''
+    Merge the shards of a result file into it, ordered by match key. Only
+    an index of the records is held in memory; the records are streamed
+    from their files into a temporary file that replaces `result_path`
+    once complete. Unparsable or truncated lines are dropped, as are
+    further normal records of a match key that already has one (e.g. a
+    match replayed after its worker lost its lease). Abnormal records are
+    kept as the attempts that preceded a normal one. Returns the counts of
+    merged shards, written records and dropped corrupt and duplicate ones.
+    '''
+    stats = collections.Counter()
+    shard_dir = get_shard_dir(result_path)
+    shard_paths = sorted(str(p) for p in pathlib.Path(shard_dir).glob('*.shard'))
+    if not shard_paths:
+        return stats
+    sources = [result_path] + shard_paths if os.path.exists(result_path) else shard_paths
+    stats['shards'] = len(shard_paths)
+
+    tmp_path = result_path + '.merge'
+    files = [open(path, 'rb') for path in sources]
+    try:
+        normal_keys = set()
+        with open(tmp_path, 'wb') as out:
+            runs = [_index_source(i, path, stats) for i, path in enumerate(sources)]
+            for _, source_idx, offset, length, match_key, normal in heapq.merge(*runs):
+                if normal and match_key is not None:
+                    if match_key in normal_keys:
+                        stats['duplicates'] += 1
+                        continue
+                    normal_keys.add(match_key)
+                files[source_idx].seek(offset)
+                data = files[source_idx].read(length)
+                if len(data) != length:
+                    raise IOError(f'{sources[source_idx]} changed while merging')
+                out.write(data)
+                stats['records'] += 1
+            out.flush()
+            os.fsync(out.fileno())
+    finally:
+        for file in files:
+            file.close()
+
+    with open(tmp_path, 'rb') as file:
+        written = sum(1 for _ in file)
+    if written != stats['records']:
+        os.remove(tmp_path)
+        raise IOError(f'merged {written} of {stats["records"]} records into {tmp_path}')
+    os.replace(tmp_path, result_path)
+    for path in shard_paths:
+        os.remove(path)
+    try:
+        os.rmdir(shard_dir)
+    except OSError:
+        # a late worker already started a new shard
+        pass
+    return stats
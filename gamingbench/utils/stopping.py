@@ -0,0 +1,96 @@
+import math
+
+
+class StoppingRule:
+    '''
+    Sequential stopping rule over the scores of the first entrant
+    (1 win, 0.5 draw, 0 loss). `check` returns a stopping reason once the
+    outcome of a game is clear enough, otherwise None.
+    '''
+
+    def __init__(self, min_matches=10) -> None:
+        self.min_matches = min_matches
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+
+    @property
+    def num_matches(self):
+        return self.wins + self.draws + self.losses
+
+    def update(self, score):
+        if score == 1:
+            self.wins += 1
+        elif score == 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+
+    def check(self):
+        if self.num_matches < self.min_matches:
+            return None
+        return self._check()
+
+    def _check(self):
+        return None
+
+
+class SPRTRule(StoppingRule):
+    '''
+    Wald's sequential probability ratio test on the first entrant's win
+    probability among decisive matches, H0: p = p0 against H1: p = p1.
+    '''
+
+    def __init__(self, p0=0.5, p1=0.7, alpha=0.05, beta=0.05, min_matches=10) -> None:
+        super().__init__(min_matches)
+        assert 0 < p0 < p1 < 1
+        self.p0 = p0
+        self.p1 = p1
+        self.upper = math.log((1 - beta) / alpha)
+        self.lower = math.log(beta / (1 - alpha))
+
+    def llr(self):
+        return self.wins * math.log(self.p1 / self.p0) + \
+            self.losses * math.log((1 - self.p1) / (1 - self.p0))
+
+    def _check(self):
+        llr = self.llr()
+        if llr >= self.upper:
+            return f'SPRT accepted H1 (win rate >= {self.p1}), LLR {llr:.2f} >= {self.upper:.2f}'
+        if llr <= self.lower:
+            return f'SPRT accepted H0 (win rate <= {self.p0}), LLR {llr:.2f} <= {self.lower:.2f}'
+        return None
+
+
+class ConfidenceIntervalRule(StoppingRule):
+    '''
+    Stops once the Wilson confidence intervals of the win, draw and loss
+    rates are all narrower than `width`.
+    '''
+
+    def __init__(self, width=0.2, z=1.96, min_matches=10) -> None:
+        super().__init__(min_matches)
+        self.width = width
+        self.z = z
+
+    def interval_width(self, count):
+        n = self.num_matches
+        p = count / n
+        z2 = self.z * self.z
+        return 2 * self.z * math.sqrt(p * (1 - p) / n + z2 / (4 * n * n)) / (1 + z2 / n)
+
+    def _check(self):
+        widest = max(self.interval_width(c)
+                     for c in [self.wins, self.draws, self.losses])
+        if widest <= self.width:
+            return f'confidence interval width {widest:.3f} <= {self.width} after {self.num_matches} matches'
+        return None
+
+
+def build_stopping_rule(args):
+    if args.stop_rule == 'sprt':
+        return SPRTRule(args.sprt_p0, args.sprt_p1, args.sprt_alpha, args.sprt_beta,
+                        min_matches=args.min_matches)
+    if args.stop_rule == 'ci':
+        return ConfidenceIntervalRule(args.ci_width, min_matches=args.min_matches)
+    return None
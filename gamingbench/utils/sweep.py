@@ -0,0 +1,138 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+
+from gamingbench.utils import utils
+
+# main.py options that change the matches a cell plays
+HASHED_OPTIONS = ['num_matches', 'seed', 'exchange_first_player', 'threshold_matches',
+                  'stop_rule', 'min_matches', 'sprt_p0', 'sprt_p1', 'sprt_alpha', 'sprt_beta',
+                  'ci_width', 'paired', 'collapse_deterministic']
+CELL_FIELDS = ['name', 'agent', 'model', 'opponent_agent', 'opponent_model']
+
+
+class SweepCell:
+    '''
+    One point of the sweep matrix: a set of games played by two entrants
+    with its own main.py options. Cells are identified by a hash of the
+    content of every config they use, so a cell whose configs did not
+    change is recognised across sweeps.
+    '''
+
+    def __init__(self, name, settings, base_args) -> None:
+        self.name = name
+        self.settings = settings
+        self.agent_configs = [settings['agent'], settings['opponent_agent']]
+        self.model_configs = [settings['model'],
+                              settings.get('opponent_model', settings['model'])]
+
+        options = {k: v for k, v in settings.items() if k not in CELL_FIELDS}
+        for key in options:
+            if not hasattr(base_args, key) or key in ['exp_root', 'agent_configs', 'model_configs']:
+                raise ValueError(f'sweep cell {name} sets unsupported option {key}')
+        self.args = argparse.Namespace(**{**vars(base_args), **options})
+        self.args.agent_configs = self.agent_configs
+        self.args.model_configs = self.model_configs
+        # completed matches of an interrupted cell are kept
+        self.args.resume = True
+
+        self.config_hash = self.get_config_hash()
+        self.args.exp_root = os.path.join(base_args.exp_root, f'{name}-{self.config_hash[:10]}')
+        self.status_path = os.path.join(self.args.exp_root, 'cell.json')
+
+    def get_config_hash(self):
+        content = {
+            'games': {g: utils.load_config(os.path.join(self.args.game_config_root, f'{g}.yaml')).to_dict()
+                      for g in self.args.game_names},
+            'agents': [utils.load_config(p).to_dict() for p in self.agent_configs],
+            'models': [utils.load_config(p).to_dict() for p in self.model_configs],
+            'options': {k: getattr(self.args, k) for k in HASHED_OPTIONS}
+        }
+        return hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+    def is_complete(self):
+        if not os.path.exists(self.status_path):
+            return False
+        with open(self.status_path) as file:
+            return json.load(file).get('complete', False)
+
+    def save_status(self, runs):
+        '''
+        `runs` holds (RunProgress, result path) of every game of the cell.
+        A run is complete when it stopped early without a run-fatal error or
+        has a normal record for every match.
+        '''
+        complete = True
+        for progress, result_path in runs:
+            normal = count_normal_matches(result_path)
+            # a run stopped by a run-fatal error has to be played again
+            if progress.failed is not None or (progress.stop_reason is None and normal < self.args.num_matches):
+                complete = False
+        with open(self.status_path, 'w') as file:
+            json.dump({'name': self.name,
+                       'config_hash': self.config_hash,
+                       'settings': self.settings,
+                       'complete': complete}, file, indent=2)
+        return complete
+
+
+def count_normal_matches(result_path):
+    '''Normal matches of a result file, collapsed ones counted with their weight.'''
+    weights = {}
+    with open(result_path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get('match_key') and record['matches'][0]['status'] == 'Normal':
+                weights[record['match_key']] = record.get('weight', 1)
+    return sum(weights.values())
+
+
+def is_combined(value, names):
+    '''Whether an axis value is combined with the value names of a cell.'''
+    for axis_name, allowed in value.get('only', {}).items():
+        if axis_name not in names:
+            raise ValueError(f'sweep value {value.get("name")} restricts unknown axis {axis_name}')
+        if names[axis_name] not in allowed:
+            return False
+    return True
+
+
+def load_sweep(sweep_path, base_args, default_exp_root):
+    '''
+    Expand the Cartesian product of the sweep axes into cells. Every axis
+    value is a mapping merged into the cell settings on top of `defaults`;
+    its `name` labels the cell and its optional `only` maps other axes to
+    the names of the values it is combined with. Cells with the same
+    config hash are only run once. The sweep root is --exp-root if given,
+    else the spec's `exp_root`, else `default_exp_root`. Returns the sweep
+    root directory and the cells.
+    '''
+    spec = utils.load_config(sweep_path).to_dict()
+    base_args = argparse.Namespace(**vars(base_args))
+    if base_args.exp_root is None:
+        base_args.exp_root = spec.get('exp_root', default_exp_root)
+    defaults = spec.get('defaults', {})
+    axes = spec['axes']
+
+    cells = []
+    seen = set()
+    for values in itertools.product(*axes.values()):
+        names = dict(zip(axes, [str(value.get('name', axis_name))
+                                for axis_name, value in zip(axes, values)]))
+        if not all(is_combined(value, names) for value in values):
+            continue
+        settings = dict(defaults)
+        for value in values:
+            settings.update({k: v for k, v in value.items() if k != 'only'})
+        settings['name'] = '-'.join(names.values())
+        cell = SweepCell(settings['name'], settings, base_args)
+        if cell.config_hash in seen:
+            continue
+        seen.add(cell.config_hash)
+        cells.append(cell)
+    return base_args.exp_root, cells
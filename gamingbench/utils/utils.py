@@ -6,6 +6,7 @@ import numpy as np
 import yaml
 import concurrent
 import json
+import zlib
 
 from concurrent.futures import ThreadPoolExecutor
 from box import Box
@@ -43,27 +44,33 @@ def get_game_config_path(game):
 
 
 def load_game(game_config_path):
-    game_config = Box.from_yaml(
-        filename=game_config_path, Loader=yaml.FullLoader)
+    return build_game(load_config(game_config_path))
+
+
+def build_game(game_config):
     return getattr(games, game_config.game_name)()
 
 
-def load_config(config_path):
+def load_config(config_path, frozen=False):
     config = Box.from_yaml(
-        filename=config_path, Loader=yaml.FullLoader)
+        filename=config_path, Loader=yaml.FullLoader, frozen_box=frozen)
 
     return config
 
 
 def load_agent(agent_config_path, **kwargs):
-    agent_config = Box.from_yaml(
-        filename=agent_config_path, Loader=yaml.FullLoader)
+    return build_agent(load_config(agent_config_path), **kwargs)
+
+
+def build_agent(agent_config, **kwargs):
     return getattr(agents, agent_config.agent_name)(agent_config, **kwargs)
 
 
 def load_model(model_config_path):
-    model_config = Box.from_yaml(
-        filename=model_config_path, Loader=yaml.FullLoader)
+    return build_model(load_config(model_config_path))
+
+
+def build_model(model_config):
     return getattr(models, model_config.model_type)(model_config)
 
 
@@ -118,12 +125,87 @@ def save_jsonl(results, path):
             f.writelines(json.dumps(r) + '\n')
 
 
+def get_match_rngs(seed, game_name, match_idx, reversed_order, num_agents=2, pair_idx=None):
+    '''
+    Independent random generators of one match: one for chance nodes and one
+    per agent seat. They only depend on (seed, game, match index, seat
+    order), so a match plays the same wherever and whenever it runs.
+    With `pair_idx` the chance stream only depends on (seed, game, pair
+    index): both seat orders of a pair, and every configuration run with
+    the same seed, draw the same chance outcomes (common random numbers).
+    '''
+    game_key = zlib.crc32(game_name.encode())
+    seed_seq = np.random.SeedSequence(
+        seed, spawn_key=(game_key, match_idx, int(reversed_order)))
+    chance_seq, *agent_seqs = seed_seq.spawn(1 + num_agents)
+    if pair_idx is not None:
+        chance_seq = np.random.SeedSequence(seed, spawn_key=(game_key, pair_idx))
+    return np.random.default_rng(chance_seq), [np.random.default_rng(s) for s in agent_seqs]
+
+
+def get_match_key(game_name, match_idx, reversed_order):
+    seat_order = 'reversed' if reversed_order else 'original'
+    return f'{game_name}:{match_idx}:{seat_order}'
+
+
+def write_json_atomic(obj, path):
+    '''Write through a temporary file so readers never see a partial file.'''
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(obj, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def repair_jsonl_tail(path):
+    '''
+    Drop a partially written last line, e.g. left behind by a killed run,
+    so that appended records start on a fresh line. Returns the number of
+    dropped bytes.
+    '''
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'rb+') as f:
+        data = f.read()
+        if not data or data.endswith(b'\n'):
+            return 0
+        keep = data.rfind(b'\n') + 1
+        f.truncate(keep)
+    return len(data) - keep
+
+
+def load_match_index(path):
+    '''
+    Index a result file by match key. A key maps to "Normal" as soon as one
+    normal record exists for it, otherwise to the status of its last record.
+    Records without a match key or that cannot be parsed are skipped.
+    '''
+    index = {}
+    if not os.path.exists(path):
+        return index
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            key = record.get('match_key')
+            if key is None:
+                continue
+            if index.get(key) != 'Normal':
+                index[key] = record['matches'][0]['status']
+    return index
+
+
 class LLMBenchLogger:
     _instance = None
+    logger_path = None
 
     def __new__(cls, logger_path, debug=False, rm_existed=False):
         if cls._instance is None:
             cls._instance = super(LLMBenchLogger, cls).__new__(cls)
+            cls.logger_path = logger_path
             cls._instance.logger = cls._configure_logger(
                 logger_path, debug, rm_existed)
         return cls._instance.logger
@@ -50,21 +50,23 @@ def analyze_performance(items):
     
     for hist in items:
         game_name = hist.get("game_config", {}).get("game_name", "unknown")
+        # a collapsed deterministic matchup stands for `weight` identical matches
+        weight = hist.get("weight", 1)
         
         for match in hist.get("matches", []):
             if match.get("status") != "Normal":
                 continue
                 
-            total_matches += 1
+            total_matches += weight
             duration = match.get("duration_seconds", 0)
             match_tokens = match.get("token_size", 0)
             
-            total_duration += duration
-            total_tokens += match_tokens
+            total_duration += duration * weight
+            total_tokens += match_tokens * weight
             
-            game_stats[game_name]["matches"] += 1
-            game_stats[game_name]["total_duration"] += duration
-            game_stats[game_name]["total_tokens"] += match_tokens
+            game_stats[game_name]["matches"] += weight
+            game_stats[game_name]["total_duration"] += duration * weight
+            game_stats[game_name]["total_tokens"] += match_tokens * weight
             game_stats[game_name]["durations"].append(duration)
             game_stats[game_name]["tokens"].append(match_tokens)
             
@@ -75,8 +77,8 @@ def analyze_performance(items):
                 num_queries = len(step.get("queries", []))
                 
                 if step_tokens > 0:
-                    agent_stats[agent_name]["total_queries"] += num_queries
-                    agent_stats[agent_name]["total_tokens"] += step_tokens
+                    agent_stats[agent_name]["total_queries"] += num_queries * weight
+                    agent_stats[agent_name]["total_tokens"] += step_tokens * weight
                     if num_queries > 0:
                         agent_stats[agent_name]["query_tokens"].extend([
                             q.get("token_size", 0) for q in step.get("queries", [])
@@ -125,13 +125,15 @@ def analyze_experiments(folders: List[Path]) -> Dict[str, Any]:
                 if not test_agent and agents_config:
                     test_agent = agents_config[0].get("agent_name", "")
                 
+                # Un enfrentamiento determinista colapsado cuenta por `weight` partidas
+                weight = hist.get("weight", 1)
                 for match in hist.get("matches", []):
-                    game_stats[game_name]["total_matches"] += 1
+                    game_stats[game_name]["total_matches"] += weight
                     
                     if match.get("status") == "Normal":
-                        game_stats[game_name]["normal_matches"] += 1
+                        game_stats[game_name]["normal_matches"] += weight
                     else:
-                        game_stats[game_name]["abnormal_matches"] += 1
+                        game_stats[game_name]["abnormal_matches"] += weight
                     
                     # Obtener el ganador
                     winner = match.get("winner", "")
@@ -144,11 +146,11 @@ def analyze_experiments(folders: List[Path]) -> Dict[str, Any]:
                     
                     # Contar victorias/derrotas/empates
                     if winner == "":
-                        game_stats[game_name]["draws"] += 1
+                        game_stats[game_name]["draws"] += weight
                     elif is_test_agent_win:
-                        game_stats[game_name]["wins"] += 1
+                        game_stats[game_name]["wins"] += weight
                     else:
-                        game_stats[game_name]["losses"] += 1
+                        game_stats[game_name]["losses"] += weight
                     
                     # Duración
                     duration = match.get("duration_seconds", 0)
@@ -66,6 +66,8 @@ def analyze(items: List[dict], llm_tag: str = "gpt-5") -> Dict:
     for hist in items:
         game = hist.get("game_config", {}).get("game_name", "unknown")
         matches = hist.get("matches", [])
+        # a collapsed deterministic matchup stands for `weight` identical matches
+        weight = hist.get("weight", 1)
 
         for m in matches:
             status = m.get("status")
@@ -88,27 +90,27 @@ def analyze(items: List[dict], llm_tag: str = "gpt-5") -> Dict:
             ]
 
             if status != "Normal":
-                per_game[game]["abnormal"] += 1
-                totals["abnormal"] += 1
+                per_game[game]["abnormal"] += weight
+                totals["abnormal"] += weight
                 continue
 
             # solo contamos partidas normales donde hay MCTS y algún GPT-5
             if not mcts_side or not gpt_side:
                 continue
 
-            per_game[game]["normal"] += 1
-            totals["normal"] += 1
+            per_game[game]["normal"] += weight
+            totals["normal"] += weight
 
             winner = m.get("winner", "")
             if winner in mcts_side:
-                per_game[game]["mcts_wins"] += 1
-                totals["mcts_wins"] += 1
+                per_game[game]["mcts_wins"] += weight
+                totals["mcts_wins"] += weight
             elif winner in gpt_side:
-                per_game[game]["gpt5_wins"] += 1
-                totals["gpt5_wins"] += 1
+                per_game[game]["gpt5_wins"] += weight
+                totals["gpt5_wins"] += weight
             else:
-                per_game[game]["draws"] += 1
-                totals["draws"] += 1
+                per_game[game]["draws"] += weight
+                totals["draws"] += weight
 
     # calcular winrates por juego
     result_per_game = {}
@@ -119,37 +119,39 @@ def analyze(items: List[dict], llm_tag: str = "gpt-oss-120b") -> Dict:
     for hist in items:
         game = hist.get("game_config", {}).get("game_name", "unknown")
         matches = hist.get("matches", [])
+        # a collapsed deterministic matchup stands for `weight` identical matches
+        weight = hist.get("weight", 1)
 
         for m in matches:
             status = m.get("status")
             if status != "Normal":
-                per_game[game]["abnormal"] += 1
-                totals["abnormal"] += 1
+                per_game[game]["abnormal"] += weight
+                totals["abnormal"] += weight
                 continue
 
             # Contar siempre los Normal
-            per_game[game]["normal"] += 1
-            totals["normal"] += 1
+            per_game[game]["normal"] += weight
+            totals["normal"] += weight
 
             winner = (m.get("winner") or "").strip()
             winner_score = m.get("winner_score", None)
 
             # Empate
             if not winner or winner.lower() in {"draw", "tie"} or winner_score == 0:
-                per_game[game]["draws"] += 1
-                totals["draws"] += 1
+                per_game[game]["draws"] += weight
+                totals["draws"] += weight
                 continue
 
             # Clasificación por string del ganador
             if winner.startswith("MCTSAgent"):
-                per_game[game]["mcts_wins"] += 1
-                totals["mcts_wins"] += 1
+                per_game[game]["mcts_wins"] += weight
+                totals["mcts_wins"] += weight
             elif winner.endswith(f"_{llm_tag}") and not winner.startswith("MCTSAgent"):
-                per_game[game]["gpt_wins"] += 1
-                totals["gpt_wins"] += 1
+                per_game[game]["gpt_wins"] += weight
+                totals["gpt_wins"] += weight
             else:
-                per_game[game]["unclassified"] += 1
-                totals["unclassified"] += 1
+                per_game[game]["unclassified"] += weight
+                totals["unclassified"] += weight
 
     # calcular winrates por juego
     result_per_game = {}
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+GTBench import-time benchmark.
+
+Features:
+- Import each module in a fresh interpreter several times and report the
+  fastest wall time, so that a warm file cache is measured.
+- Check that heavy dependencies (pyspiel, open_spiel, langchain) are not
+  imported by modules that should resolve them lazily.
+- Exit with status 1 when a module loads a forbidden dependency or, with
+  --max-seconds, is slower, so that regressions fail a CI step.
+
+Run it from the repository root.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+DEFAULT_MODULES = ["gamingbench", "gamingbench.utils.utils", "gamingbench.main"]
+DEFAULT_FORBIDDEN = ["pyspiel", "open_spiel", "langchain", "langchain_core"]
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(','.join(m for m in {forbidden!r} if m in sys.modules))
+"""
+
+
+def measure(module, forbidden, repeat):
+    best = None
+    loaded = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", PROBE.format(module=module, forbidden=forbidden)],
+                             capture_output=True, text=True, check=True).stdout.split("\n")
+        elapsed = float(out[0])
+        best = elapsed if best is None else min(best, elapsed)
+        loaded = [m for m in out[1].split(",") if m]
+    return {"seconds": round(best, 4), "forbidden_loaded": loaded}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time of GTBench modules in fresh interpreters")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES, help="Modules to import")
+    parser.add_argument("--forbid", nargs="*", default=DEFAULT_FORBIDDEN,
+                        help="Modules that must not be loaded by the import")
+    parser.add_argument("--repeat", type=int, default=5, help="Imports per module, the fastest is kept")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Fail when an import is slower")
+    args = parser.parse_args()
+
+    report = {m: measure(m, args.forbid, args.repeat) for m in args.modules}
+    print(json.dumps(report, indent=2))
+
+    failed = [m for m, r in report.items()
+              if r["forbidden_loaded"] or (args.max_seconds is not None and r["seconds"] > args.max_seconds)]
+    if failed:
+        print(f"import regression in: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+GTBench paired-difference report for runs played with --paired.
+
+Features:
+- Per result file: score of the first entrant averaged over seat-swapped
+  pairs, with the standard error of the pairs against the one of the same
+  matches treated as independent.
+- With --baseline: difference between two configurations on the same
+  pairs (same seed and game), with its paired standard error and 95%
+  confidence interval.
+
+The variance reduction factor is how many times more independent matches
+the unpaired design needs for the same standard error.
+"""
+
+import argparse
+import json
+import math
+from collections import defaultdict
+from pathlib import Path
+
+
+def load_scores(path: Path):
+    """Map match_key -> (pair unit, first entrant score) of normal matches."""
+    scores = {}
+    with path.open("r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            key = record.get("match_key")
+            score = record.get("entrant_score")
+            if key is None or score is None or key in scores:
+                continue
+            unit = record.get("pair_idx", key)
+            scores[key] = (unit, score)
+    return scores
+
+
+def mean_and_se(values):
+    n = len(values)
+    if n == 0:
+        return None, None
+    mean = sum(values) / n
+    if n < 2:
+        return mean, None
+    var = sum((v - mean) ** 2 for v in values) / (n - 1)
+    return mean, math.sqrt(var / n)
+
+
+def reduction(se_unpaired, se_paired):
+    if not se_unpaired or not se_paired:
+        return None
+    return round((se_unpaired / se_paired) ** 2, 3)
+
+
+def pair_means(scores, keys=None):
+    units = defaultdict(list)
+    for key, (unit, score) in scores.items():
+        if keys is None or key in keys:
+            units[unit].append(score)
+    return {unit: sum(v) / len(v) for unit, v in units.items()}
+
+
+def seat_pair_report(scores):
+    per_match = [score for _, score in scores.values()]
+    pairs = list(pair_means(scores).values())
+    mean, se_paired = mean_and_se(pairs)
+    _, se_unpaired = mean_and_se(per_match)
+    return {
+        "matches": len(per_match),
+        "pairs": len(pairs),
+        "mean_score": mean,
+        "se_paired": se_paired,
+        "se_unpaired": se_unpaired,
+        "variance_reduction": reduction(se_unpaired, se_paired),
+    }
+
+
+def difference_report(scores, baseline, z=1.96):
+    # only matches both configurations completed are compared
+    keys = set(scores) & set(baseline)
+    a = pair_means(scores, keys)
+    b = pair_means(baseline, keys)
+    units = sorted(set(a) & set(b), key=str)
+    diffs = [a[u] - b[u] for u in units]
+    mean, se_paired = mean_and_se(diffs)
+    _, se_a = mean_and_se([a[u] for u in units])
+    _, se_b = mean_and_se([b[u] for u in units])
+    se_unpaired = math.sqrt(se_a ** 2 + se_b ** 2) if se_a is not None and se_b is not None else None
+    report = {
+        "units": len(units),
+        "mean_difference": mean,
+        "se_paired": se_paired,
+        "se_unpaired": se_unpaired,
+        "variance_reduction": reduction(se_unpaired, se_paired),
+    }
+    if se_paired:
+        report["ci95"] = [mean - z * se_paired, mean + z * se_paired]
+        report["z"] = mean / se_paired
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paired-difference statistics of GTBench JSONL results")
+    parser.add_argument("paths", nargs="+", help="Result .jsonl files")
+    parser.add_argument("--baseline", type=str, help="Result .jsonl file every path is compared against")
+    parser.add_argument("--save", type=str, help="Path to save the report as JSON")
+    args = parser.parse_args()
+
+    baseline = load_scores(Path(args.baseline)) if args.baseline else None
+    report = {}
+    for p in args.paths:
+        scores = load_scores(Path(p))
+        report[p] = {"seat_pairs": seat_pair_report(scores)}
+        if baseline is not None:
+            report[p]["vs_baseline"] = difference_report(scores, baseline)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
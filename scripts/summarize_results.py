@@ -5,6 +5,7 @@ GTBench results summarizer.
 Features:
 - Aggregate across one or many .jsonl files.
 - Report total histories, matches normales/abnormales, draws, winners.
+- Collapsed deterministic matchups (--collapse-deterministic) count with their weight.
 - Per agent_model (e.g., PromptAgent_gpt-5): wins, losses, draws.
 - Optional per-match listing with sequence of moves.
 """
@@ -37,6 +38,8 @@ def summarize(items, per_match=False):
     If per_match=True, include a compact listing of matches with move sequences.
     """
     total_runs = len(items)
+    # matches the histories stand for, collapsed ones counted with their weight
+    weighted_runs = sum(hist.get("weight", 1) for hist in items)
     games = Counter()
     normal_matches = 0
     abnormal_matches = 0
@@ -60,12 +63,14 @@ def summarize(items, per_match=False):
 
     for hist in items:
         game = hist.get("game_config", {}).get("game_name", "unknown")
-        games[game] += 1
-        tokens_total += hist.get("token_size", 0)
+        # a collapsed deterministic matchup stands for `weight` identical matches
+        weight = hist.get("weight", 1)
+        games[game] += weight
+        tokens_total += hist.get("token_size", 0) * weight
 
         # accumulate win rates
         for agent, rate in hist.get("win_rate", {}).items():
-            win_rates_acc[agent].append(rate)
+            win_rates_acc[agent].extend([rate] * weight)
 
         for match_index, m in enumerate(hist.get("matches", [])):
             # Track duration if available
@@ -85,23 +90,23 @@ def summarize(items, per_match=False):
                         participants.append(key)
 
             if m.get("status") == "Normal":
-                normal_matches += 1
+                normal_matches += weight
                 winner = m.get("winner", "")
                 if winner:
-                    winners[winner] += 1
+                    winners[winner] += weight
                     # mark W/L
-                    wld[winner]["wins"] += 1
+                    wld[winner]["wins"] += weight
                     for p in participants:
                         if p != winner:
-                            wld[p]["losses"] += 1
+                            wld[p]["losses"] += weight
                 else:
-                    draw_matches += 1
+                    draw_matches += weight
                     for p in participants:
-                        wld[p]["draws"] += 1
+                        wld[p]["draws"] += weight
             else:
-                abnormal_matches += 1
+                abnormal_matches += weight
                 for a in m.get("agents_at_fault", []):
-                    agents_fault[a] += 1
+                    agents_fault[a] += weight
 
             if per_match:
                 seq = []
@@ -123,7 +128,7 @@ def summarize(items, per_match=False):
 
     # average win rates
     avg_win_rates = {k: (sum(v)/len(v) if v else 0.0) for k, v in win_rates_acc.items()}
-    avg_tokens = tokens_total / total_runs if total_runs else 0
+    avg_tokens = tokens_total / weighted_runs if weighted_runs else 0
     
     # Calculate time statistics
     avg_duration = total_duration / len(match_durations) if match_durations else 0